@@ -0,0 +1,451 @@
+"""Offline simulation of KLEE's solver caches, driven by recorded query logs."""
+
+from querylog import (
+    HEADER,
+    SExpr,
+    fold_sexpr,
+    iter_queries,
+    open_log,
+    parse_sexprs,
+    query_outcome,
+    split_query,
+)
+
+import hashlib
+import math
+
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+Constraints = FrozenSet[bytes]
+
+# Query types that KLEE's branch cache (its CachingSolver) answers and records.
+# Value and InitialValues queries bypass it for the solvers below.
+BRANCH_CACHED_TYPES = ("Truth", "Validity")
+
+
+@dataclass
+class SimQuery:
+    """A logged query, reduced to what the caches see of it."""
+
+    type: str  # KLEE's query type, e.g. "Validity", or "" if not logged.
+    constraints: Constraints  # Every constraint, including the query expression.
+    expression: bytes  # The (negated) query expression.
+    arrays: Dict[bytes, FrozenSet[bytes]]  # Arrays each constraint reads.
+    result: int  # 1 if satisfiable, 0 if unsatisfiable, -1 if unknown.
+    elapsed: float  # Solver time recorded by KLEE, in seconds.
+
+
+class _Term(NamedTuple):
+    """A folded subexpression: a digest of its structure, and what it reads."""
+
+    key: bytes
+    arrays: FrozenSet[bytes]
+    conjuncts: Tuple["_Term", ...]  # Operands of nested top-level `and`s, if any.
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _assertions(commands: List[SExpr]) -> List[Tuple[_Term, ...]]:
+    """Fold each assertion of a query into its conjuncts."""
+    arrays = {
+        c[1]
+        for c in commands
+        if isinstance(c, list) and len(c) > 1 and c[0] == b"declare-fun"
+    }
+
+    def leaf(atom: bytes) -> _Term:
+        return _Term(_digest(atom), frozenset([atom] if atom in arrays else ()), ())
+
+    def apply(node: List[SExpr], terms: List[_Term]) -> _Term:
+        key = _digest(b"(" + b" ".join(t.key for t in terms) + b")")
+        reads = frozenset().union(*(t.arrays for t in terms))
+        conjuncts: Tuple[_Term, ...] = ()
+        if node and node[0] == b"and":
+            conjuncts = tuple(c for t in terms[1:] for c in (t.conjuncts or (t,)))
+        return _Term(key, reads, conjuncts)
+
+    asserts = []
+    for command in commands:
+        if isinstance(command, list) and len(command) == 2:
+            if command[0] == b"assert":
+                term = fold_sexpr(command[1], leaf, apply)
+                asserts.append(term.conjuncts or (term,))
+    return asserts
+
+
+def parse_query(query: bytes) -> Optional[SimQuery]:
+    """
+    Reduce a logged query to its constraints and outcome.
+
+    Constraints are identified by a digest of their structure, with any `let`
+    abbreviations expanded, so that the same constraint matches across queries
+    however it was printed. By default, KLEE logs a query as one assertion, of
+    the query expression and then every constraint joined by `and`, with shared
+    subexpressions abbreviated by `let`. With `--smtlib-abbreviation-mode=none`,
+    it asserts each constraint on its own and the query expression last. Both
+    forms are split into the same constraints.
+
+    Args:
+        query (bytes): The query, as split from a log by `iter_queries`.
+
+    Returns:
+        Optional[SimQuery]: The query, or None if it asserts nothing.
+    """
+    text, notes = split_query(query)
+    asserts = _assertions(parse_sexprs(text))
+    if not asserts:
+        return None
+
+    terms = [term for conjuncts in asserts for term in conjuncts]
+    header = HEADER.search(notes)
+    result, elapsed = query_outcome(query)
+    return SimQuery(
+        header.group(1).decode() if header is not None else "",
+        frozenset(term.key for term in terms),
+        asserts[-1][0].key,
+        {term.key: term.arrays for term in terms},
+        result,
+        elapsed,
+    )
+
+
+def independent_part(query: SimQuery) -> Constraints:
+    """
+    Keep only the constraints that (transitively) share arrays with the query
+    expression, as KLEE's independent solver does before consulting its caches.
+
+    Args:
+        query (SimQuery): The query.
+
+    Returns:
+        Constraints: The expression and the constraints it depends on.
+    """
+    relevant, kept = set(query.arrays[query.expression]), {query.expression}
+    changed = True
+    while changed:
+        changed = False
+        for c, used in query.arrays.items():
+            if c not in kept and used & relevant:
+                kept.add(c)
+                relevant |= used
+                changed = True
+    return frozenset(kept)
+
+
+class ExactCache:
+    """
+    A model of KLEE's branch cache, which answers repeats of the same query.
+
+    Attributes:
+        capacity (Optional[int]): Maximum entries, evicting the least recently
+            used, or None for no limit (as in KLEE).
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        """
+        Initialize the ExactCache.
+
+        Args:
+            capacity (Optional[int]): Maximum entries, or None for no limit.
+        """
+        self.capacity = capacity
+        self._entries: "OrderedDict[Constraints, int]" = OrderedDict()
+
+    def lookup(self, constraints: Constraints) -> Optional[str]:
+        """
+        Look a query up.
+
+        Args:
+            constraints (Constraints): The query's constraints.
+
+        Returns:
+            Optional[str]: "exact" on a hit, or None on a miss.
+        """
+        if constraints not in self._entries:
+            return None
+        self._entries.move_to_end(constraints)
+        return "exact"
+
+    def insert(self, constraints: Constraints, result: int) -> None:
+        """
+        Record the outcome of a query that was solved.
+
+        Args:
+            constraints (Constraints): The query's constraints.
+            result (int): The outcome, 1 if satisfiable and 0 if unsatisfiable.
+        """
+        if result not in (0, 1):
+            return  # Failed queries are not cached.
+
+        self._entries[constraints] = result
+        self._entries.move_to_end(constraints)
+        if self.capacity is not None and len(self._entries) > self.capacity:
+            self._evict(*self._entries.popitem(last=False))
+
+    def _evict(self, constraints: Constraints, result: int) -> None:
+        """Called with each entry evicted to respect the capacity."""
+
+
+class CexCache(ExactCache):
+    """
+    A model of KLEE's counterexample cache, which also matches related queries.
+
+    Besides exact repeats, a query is answered if a cached subset of its
+    constraints was unsatisfiable (so it is too), or if a cached superset was
+    satisfiable (so its solution satisfies this query). KLEE additionally tries
+    cached solutions against the query, which this model cannot without
+    evaluating expressions, so its hit rates are a lower bound.
+
+    Attributes:
+        subsets (bool): Whether to answer from unsatisfiable subsets.
+        supersets (bool): Whether to answer from satisfiable supersets.
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        subsets: bool = True,
+        supersets: bool = True,
+    ):
+        """
+        Initialize the CexCache.
+
+        Args:
+            capacity (Optional[int]): Maximum entries, or None for no limit.
+            subsets (bool): Whether to answer from unsatisfiable subsets.
+            supersets (bool): Whether to answer from satisfiable supersets.
+        """
+        super().__init__(capacity)
+        self.subsets = subsets
+        self.supersets = supersets
+        # Cached sets containing each constraint, by outcome.
+        self._containing: Dict[int, Dict[bytes, Set[Constraints]]] = {
+            0: defaultdict(set),
+            1: defaultdict(set),
+        }
+
+    def _has_unsat_subset(self, constraints: Constraints) -> bool:
+        seen: Dict[Constraints, int] = defaultdict(int)
+        for c in constraints:
+            for cached in self._containing[0].get(c, ()):
+                seen[cached] += 1
+                if seen[cached] == len(cached):
+                    return True
+        return False
+
+    def _has_sat_superset(self, constraints: Constraints) -> bool:
+        candidates: Optional[Set[Constraints]] = None
+        for c in sorted(constraints, key=lambda c: len(self._containing[1].get(c, ()))):
+            containing = self._containing[1].get(c)
+            if not containing:
+                return False
+            candidates = set(containing) if candidates is None else candidates
+            candidates &= containing
+            if not candidates:
+                return False
+        return bool(candidates)
+
+    def lookup(self, constraints: Constraints) -> Optional[str]:
+        """
+        Look a query up.
+
+        Args:
+            constraints (Constraints): The query's constraints.
+
+        Returns:
+            Optional[str]: "exact", "subset" or "superset" for the kind of hit,
+            or None on a miss.
+        """
+        if super().lookup(constraints) is not None:
+            return "exact"
+        if self.subsets and self._has_unsat_subset(constraints):
+            return "subset"
+        if self.supersets and self._has_sat_superset(constraints):
+            return "superset"
+        return None
+
+    def insert(self, constraints: Constraints, result: int) -> None:
+        """
+        Record the outcome of a query that was solved.
+
+        Args:
+            constraints (Constraints): The query's constraints.
+            result (int): The outcome, 1 if satisfiable and 0 if unsatisfiable.
+        """
+        if result not in (0, 1):
+            return
+
+        replaced = self._entries.get(constraints)
+        if replaced is not None:
+            self._evict(constraints, replaced)
+        for c in constraints:
+            self._containing[result][c].add(constraints)
+        super().insert(constraints, result)
+
+    def _evict(self, constraints: Constraints, result: int) -> None:
+        for c in constraints:
+            containing = self._containing[result][c]
+            containing.discard(constraints)
+            if not containing:
+                del self._containing[result][c]
+
+
+@dataclass
+class CachePolicy:
+    """A configuration of the solver chain's caches, named for reports."""
+
+    name: str
+    independent: bool = True  # As with KleeRunOptions.independent.
+    branch: Optional[ExactCache] = None  # As with KleeRunOptions.branch.
+    cex: Optional[CexCache] = None  # As with KleeRunOptions.cex.
+
+
+@dataclass
+class CacheReport:
+    """What a cache policy would have saved on a query log."""
+
+    name: str
+    queries: int = 0
+    hits: Dict[str, int] = field(default_factory=dict)  # By kind of hit.
+    solver_time: float = 0.0  # Recorded solver time of every query.
+    saved_time: float = 0.0  # Recorded solver time of queries answered.
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of queries answered by a cache."""
+        return sum(self.hits.values()) / self.queries if self.queries else 0.0
+
+    def describe(self) -> str:
+        """
+        Summarise the report in one line.
+
+        Returns:
+            str: A human-readable summary.
+        """
+        kinds = ", ".join(f"{kind} {count}" for kind, count in self.hits.items())
+        share = 100 * self.saved_time / self.solver_time if self.solver_time else 0.0
+        return (
+            f"{self.name}: {100 * self.hit_rate:.1f}% of {self.queries} queries"
+            f" hit ({kinds or 'none'}), saving {self.saved_time:.2f}s"
+            f" of {self.solver_time:.2f}s solver time ({share:.1f}%)"
+        )
+
+
+def _solve(policy: CachePolicy, query: SimQuery) -> Optional[str]:
+    """Pass a query through a policy's caches, as KLEE's solver chain would."""
+    constraints = independent_part(query) if policy.independent else query.constraints
+
+    # The branch cache sits above the counterexample cache in KLEE's chain, and
+    # each cache records the answers of the layers below it, cached or not.
+    branch = policy.branch if query.type in BRANCH_CACHED_TYPES else None
+    passed = []
+    for cache, kind in ((branch, "branch"), (policy.cex, "cex")):
+        if cache is None:
+            continue
+        hit = cache.lookup(constraints)
+        if hit is not None:
+            for above in passed:
+                above.insert(constraints, query.result)
+            return f"{kind} {hit}"
+        passed.append(cache)
+
+    for cache in passed:
+        cache.insert(constraints, query.result)
+    return None
+
+
+def simulate(log_path: str, policies: Sequence[CachePolicy]) -> List[CacheReport]:
+    """
+    Replay a query log through several cache policies at once, in one pass.
+
+    The log should be recorded by a run without caches (`cex`, `branch` and
+    `independent` off), so that it holds every query and its recorded solver
+    times are those of the solver itself rather than of a cache. As in KLEE,
+    only Truth and Validity queries pass through the branch cache.
+
+    Args:
+        log_path (str): Path to the query log, possibly compressed.
+        policies (Sequence[CachePolicy]): The policies to evaluate, each with
+            fresh caches.
+
+    Returns:
+        List[CacheReport]: A report per policy, in the order given.
+    """
+    reports = [CacheReport(policy.name) for policy in policies]
+
+    with open_log(log_path) as log:
+        for query in _parsed(iter_queries(log)):
+            elapsed = 0.0 if math.isnan(query.elapsed) else query.elapsed
+            for policy, report in zip(policies, reports):
+                report.queries += 1
+                report.solver_time += elapsed
+                hit = _solve(policy, query)
+                if hit is not None:
+                    report.hits[hit] = report.hits.get(hit, 0) + 1
+                    report.saved_time += elapsed
+
+    return reports
+
+
+def _parsed(queries: Iterator[bytes]) -> Iterator[SimQuery]:
+    for query in queries:
+        parsed = parse_query(query)
+        if parsed is not None:
+            yield parsed
+
+
+def default_policies(
+    capacities: Sequence[Optional[int]] = (None,)
+) -> List[CachePolicy]:
+    """
+    Get policies mirroring the cache flags of KleeRunOptions, at given capacities.
+
+    Args:
+        capacities (Sequence[Optional[int]]): Cache capacities to try, None
+            meaning unlimited.
+
+    Returns:
+        List[CachePolicy]: For each capacity, each cache alone, the
+        counterexample cache without subset/superset matching, and all caches
+        behind the independent solver, as KLEE enables them by default.
+    """
+    policies = []
+    for capacity in capacities:
+        suffix = f" (capacity {capacity})" if capacity is not None else ""
+        policies += [
+            CachePolicy(f"branch{suffix}", False, branch=ExactCache(capacity)),
+            CachePolicy(f"cex{suffix}", False, cex=CexCache(capacity)),
+            CachePolicy(
+                f"cex exact-only{suffix}",
+                False,
+                cex=CexCache(capacity, subsets=False, supersets=False),
+            ),
+            CachePolicy(f"all{suffix}", True, ExactCache(capacity), CexCache(capacity)),
+        ]
+    return policies
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) >= 2:
+        capacities = [int(c) for c in sys.argv[2:]] or [None]
+        for report in simulate(sys.argv[1], default_policies(capacities)):
+            print(report.describe())
+    else:
+        print("Usage: python cachesim.py <query_log> [capacity ...]")
+        sys.exit(1)
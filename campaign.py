@@ -0,0 +1,527 @@
+"""Run campaigns of many KLEE configurations concurrently."""
+
+from journal import CampaignJournal
+from kresult import KResult, KRunField
+from monitor import CoveragePlateau, StatsMonitor
+from querylog import LogCompression
+from reaper import OutputReaper
+from resultcache import ResultCache
+from resources import PhysicalCore, available_memory_mb, physical_cores, tree_rss_mb
+from runklee import PHASE_FIELDS, KleeRunOptions, KleeRunner
+from sandbox import SandboxPool
+from scratch import ScratchSpace
+from util import ProgressLogger
+
+import dataclasses
+import os
+import threading
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+
+class MemoryAdmission:
+    """
+    Admission control that packs runs by their declared memory budgets.
+
+    A run is admitted only while the sum of the `memory` budgets of admitted runs,
+    plus a safety margin, fits in the memory available to the campaign. That is
+    the host's currently available memory (from /proc/meminfo) plus whatever the
+    admitted KLEE processes already hold. Admission is additionally held back
+    while the measured RSS of the running KLEE process trees approaches the limit.
+
+    Attributes:
+        margin_mb (int): Memory, in MiB, kept free beyond the declared budgets.
+        high_water (float): Fraction of the limit that the measured RSS of
+            running processes may reach before admission is held back.
+        poll_interval (float): Seconds between re-measurements while waiting.
+    """
+
+    def __init__(
+        self,
+        margin_mb: int = 1024,
+        high_water: float = 0.9,
+        poll_interval: float = 1.0,
+    ):
+        """
+        Initialize the MemoryAdmission.
+
+        Args:
+            margin_mb (int): Memory, in MiB, kept free beyond declared budgets.
+            high_water (float): Fraction of the limit that measured RSS may
+                reach before admission is held back.
+            poll_interval (float): Seconds between re-measurements while waiting.
+        """
+        self.margin_mb = margin_mb
+        self.high_water = high_water
+        self.poll_interval = poll_interval
+
+        self._running: List[KleeRunner] = []
+        self._committed_mb = 0
+        self._condition = threading.Condition()
+
+    def _running_rss_mb(self) -> float:
+        return sum(
+            tree_rss_mb(runner.process.pid)
+            for runner in self._running
+            if runner.process is not None
+        )
+
+    def _fits(self, budget_mb: int) -> bool:
+        if not self._running:
+            return True  # Always make progress, even if a budget is oversized.
+
+        rss_mb = self._running_rss_mb()
+        limit_mb = available_memory_mb() + rss_mb - self.margin_mb
+
+        return (
+            self._committed_mb + budget_mb <= limit_mb
+            and rss_mb < self.high_water * limit_mb
+        )
+
+    @contextmanager
+    def admit(self, runner: KleeRunner) -> Iterator[None]:
+        """
+        Context manager that blocks until a run fits, and holds its budget.
+
+        Args:
+            runner (KleeRunner): The runner about to be run.
+        """
+        budget_mb = runner.options.memory
+
+        with self._condition:
+            while not self._fits(budget_mb):
+                self._condition.wait(self.poll_interval)
+            self._running.append(runner)
+            self._committed_mb += budget_mb
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running.remove(runner)
+                self._committed_mb -= budget_mb
+                self._condition.notify_all()
+
+
+class CorePlacement:
+    """
+    Placement that gives each run a dedicated physical core.
+
+    Each run is pinned to a single hardware thread of a physical core whose SMT
+    siblings are left idle, so runs never share execution units. Cores are drawn
+    from the NUMA node with the most free cores, so that concurrent runs spread
+    evenly across nodes and each run's memory stays local to its core. The first
+    `reserve` cores are kept for the harness itself, which `pin_harness` moves
+    onto.
+
+    Attributes:
+        reserved (List[PhysicalCore]): Cores kept free of KLEE runs.
+    """
+
+    def __init__(self, reserve: int = 1):
+        """
+        Initialize the CorePlacement from the host's CPU topology.
+
+        Args:
+            reserve (int): Number of physical cores to keep for the harness.
+        """
+        cores = physical_cores()
+        assert len(cores) > reserve, "Expected a free core after reservations"
+
+        self.reserved = cores[:reserve]
+        self._free = cores[reserve:]
+        self._condition = threading.Condition()
+
+    def pin_harness(self) -> None:
+        """
+        Pin this process to the reserved cores.
+
+        Every thread of the process is pinned, including campaign workers, log
+        compression and the reaper, as are helper subprocesses like `klee-stats`.
+        KLEE runs are still pinned to their own cores by `place`.
+        """
+        if self.reserved:
+            os.sched_setaffinity(0, [c for core in self.reserved for c in core.cpus])
+
+    def _take(self) -> PhysicalCore:
+        nodes = [core.node for core in self._free]
+        roomiest = max(set(nodes), key=nodes.count)
+        core = next(core for core in self._free if core.node == roomiest)
+        self._free.remove(core)
+        return core
+
+    @contextmanager
+    def place(self, runner: KleeRunner) -> Iterator[PhysicalCore]:
+        """
+        Context manager that pins a runner to a free core for its duration.
+
+        Args:
+            runner (KleeRunner): The runner about to be run.
+
+        Yields:
+            PhysicalCore: The core the runner is pinned to.
+        """
+        with self._condition:
+            while not self._free:
+                self._condition.wait()
+            core = self._take()
+
+        runner.cpus = [core.cpus[0]]
+        try:
+            yield core
+        finally:
+            with self._condition:
+                self._free.append(core)
+                self._condition.notify()
+
+
+class KleeCampaign:
+    """
+    Execute KLEE runs across a configurable number of worker slots.
+
+    Every slot supervises a single KLEE process at a time. Since KLEE itself runs
+    as a separate process, slots are threads: they only block on the subprocess,
+    so one slot per core keeps every core busy without pickling run options.
+
+    Attributes:
+        workers (int): Number of runs that may execute concurrently.
+        output_root (Optional[str]): Directory in which output directories are
+            placed, or None to use each run's `dirName` as given.
+        logger (Optional[ProgressLogger]): Logger for progress information.
+        sandboxes (Optional[SandboxPool]): Pool of private sandboxes that runs
+            execute in, or None to use each run's `runInDir` as given.
+        admission (Optional[MemoryAdmission]): Admission control that holds runs
+            back until memory is available, or None to start runs immediately.
+        placement (Optional[CorePlacement]): Placement that pins each run to a
+            dedicated core, or None to let runs float across cores.
+        cache (Optional[ResultCache]): Cache of results that identical runs are
+            answered from without launching KLEE.
+        journal (Optional[CampaignJournal]): Journal that completed runs are
+            recorded in, and that runs completed before a restart are replayed from.
+        monitor (Optional[StatsMonitor]): Monitor that reports each run's
+            statistics while it is running.
+        stopping (Optional[CoveragePlateau]): Policy that halts runs early once
+            their coverage stops improving.
+        record_series (bool): Whether to attach every statistics snapshot of each
+            run to its results, as `KResult.series`. Such runs are never answered
+            from the cache, and results replayed from the journal carry no series.
+        reaper (Optional[OutputReaper]): Reaper that deletes output directories
+            in the background, so that worker slots are freed sooner.
+        scratch (Optional[ScratchSpace]): In-memory space that runs write their
+            output to, from which only selected artifacts are kept.
+        log_compression (Optional[LogCompression]): Compression that runs'
+            query logs are streamed through.
+        phase_totals (Dict[KRunField, float]): Seconds spent in each phase,
+            summed over the runs this campaign launched.
+        timed_runs (int): Number of runs counted in `phase_totals`.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        output_root: Optional[str] = None,
+        logger: Optional[ProgressLogger] = None,
+        sandboxes: Optional[SandboxPool] = None,
+        admission: Optional[MemoryAdmission] = None,
+        placement: Optional[CorePlacement] = None,
+        cache: Optional[ResultCache] = None,
+        journal: Optional[CampaignJournal] = None,
+        monitor: Optional[StatsMonitor] = None,
+        reaper: Optional[OutputReaper] = None,
+        scratch: Optional[ScratchSpace] = None,
+        log_compression: Optional[LogCompression] = None,
+        stopping: Optional[CoveragePlateau] = None,
+        record_series: bool = False,
+    ):
+        """
+        Initialize the KleeCampaign.
+
+        Args:
+            workers (Optional[int]): Number of worker slots, defaulting to the
+                number of CPUs on the machine.
+            output_root (Optional[str]): Directory in which to place each run's
+                output directory.
+            logger (Optional[ProgressLogger]): Logger for progress information.
+            sandboxes (Optional[SandboxPool]): Pool of private sandboxes, which
+                should have at least as many slots as there are workers.
+            admission (Optional[MemoryAdmission]): Memory admission control.
+            placement (Optional[CorePlacement]): Core placement for runs.
+            cache (Optional[ResultCache]): Cache of results of earlier runs.
+            journal (Optional[CampaignJournal]): Journal of the campaign's runs.
+            monitor (Optional[StatsMonitor]): Monitor for live statistics.
+            reaper (Optional[OutputReaper]): Reaper for output directories.
+            scratch (Optional[ScratchSpace]): In-memory space for runs' output.
+            log_compression (Optional[LogCompression]): Query log compression.
+            stopping (Optional[CoveragePlateau]): Policy for stopping runs early.
+            record_series (bool): Whether to attach runs' statistics series.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.output_root = output_root
+        self.logger = logger
+        self.sandboxes = sandboxes
+        self.admission = admission
+        self.placement = placement
+        self.cache = cache
+        self.journal = journal
+        self.monitor = monitor
+        self.reaper = reaper
+        self.scratch = scratch
+        self.log_compression = log_compression
+        self.stopping = stopping
+        self.record_series = record_series
+
+        if output_root is not None:
+            os.makedirs(output_root, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="klee-slot"
+        )
+        self._dir_names: Set[str] = set()
+        self._lock = threading.Lock()
+        self.phase_totals: Dict[KRunField, float] = {}
+        self.timed_runs = 0
+
+    def _isolate(self, options: KleeRunOptions) -> KleeRunOptions:
+        """
+        Give a run its own output directory, so concurrent runs never share one.
+
+        Args:
+            options (KleeRunOptions): Configuration options for the KLEE run.
+
+        Returns:
+            KleeRunOptions: A copy of the options with a unique `dirName`.
+        """
+        dir_name = options.dirName
+        if self.output_root is not None:
+            dir_name = os.path.join(self.output_root, dir_name)
+
+        with self._lock:
+            unique, suffix = dir_name, 1
+            while unique in self._dir_names:
+                unique, suffix = f"{dir_name}-{suffix}", suffix + 1
+            self._dir_names.add(unique)
+
+        return dataclasses.replace(options, dirName=unique)
+
+    def _run(
+        self, submitted: KleeRunOptions, options: KleeRunOptions, repetition: int
+    ) -> KResult:
+        """
+        Execute a single run within a worker slot, unless already journaled.
+
+        Args:
+            submitted (KleeRunOptions): Options as submitted, which identify the
+                run in the journal across restarts.
+            options (KleeRunOptions): Isolated options to run KLEE with.
+            repetition (int): Number of earlier submissions of `submitted`.
+
+        Returns:
+            KResult: The results of the KLEE run.
+        """
+        if self.journal is None:
+            return self._execute(options)
+
+        results = self.journal.completed(submitted, repetition)
+        if results is None:
+            self.journal.plan(submitted, repetition)
+            results = self._execute(options)
+            self.journal.complete(submitted, results, repetition)
+        return results
+
+    def _execute(self, options: KleeRunOptions) -> KResult:
+        """
+        Execute a single run within a worker slot.
+
+        Args:
+            options (KleeRunOptions): Configuration options for the KLEE run.
+
+        Returns:
+            KResult: The results of the KLEE run.
+        """
+        runner = KleeRunner(
+            options,
+            self.logger,
+            monitor=self.monitor,
+            stopping=self.stopping,
+            reaper=self.reaper,
+            scratch=self.scratch,
+            log_compression=self.log_compression,
+            record_series=self.record_series,
+        )
+
+        # Cache hits need no sandbox, memory or core, so check before taking any.
+        if self.cache is not None and not self.record_series:
+            results = self.cache.lookup(runner)
+            if results is not None:
+                return results
+
+        with ExitStack() as stack:
+            if self.sandboxes is not None:
+                sandbox_dir = stack.enter_context(self.sandboxes.sandbox())
+                runner.options = dataclasses.replace(options, runInDir=sandbox_dir)
+
+            if self.admission is not None:
+                stack.enter_context(self.admission.admit(runner))
+
+            core = None
+            if self.placement is not None:
+                core = stack.enter_context(self.placement.place(runner))
+
+            results = runner.run()
+
+        with self._lock:
+            for phase, seconds in runner.timings.items():
+                self.phase_totals[phase] = self.phase_totals.get(phase, 0.0) + seconds
+            self.timed_runs += 1
+
+        if core is not None:
+            results.set(KRunField.NUMA_NODE, core.node)
+        if self.cache is not None:
+            self.cache.store(runner, results)
+        return results
+
+    def submit(
+        self,
+        options: KleeRunOptions,
+        callback: Optional[Callable[[KleeRunOptions, KResult], None]] = None,
+    ) -> "Future[KResult]":
+        """
+        Schedule a KLEE run on the next free worker slot.
+
+        Args:
+            options (KleeRunOptions): Configuration options for the KLEE run.
+            callback (Optional[Callable[[KleeRunOptions, KResult], None]]): Called
+                with the (isolated) options and results once the run succeeds.
+
+        Returns:
+            Future[KResult]: A future resolving to the results of the KLEE run.
+        """
+        submitted, options = options, self._isolate(options)
+        repetition = 0 if self.journal is None else self.journal.repetition(submitted)
+        future = self._executor.submit(self._run, submitted, options, repetition)
+
+        if callback is not None:
+
+            def on_done(f: "Future[KResult]") -> None:
+                if not f.cancelled() and f.exception() is None:
+                    callback(options, f.result())
+
+            future.add_done_callback(on_done)
+
+        return future
+
+    def map(self, options_list: List[KleeRunOptions]) -> List[KResult]:
+        """
+        Run every configuration and wait for all of them to finish.
+
+        Args:
+            options_list (List[KleeRunOptions]): Configurations to run.
+
+        Returns:
+            List[KResult]: Results, in the same order as `options_list`.
+        """
+        futures = [self.submit(options) for options in options_list]
+        return [future.result() for future in futures]
+
+    def phase_summary(self) -> str:
+        """
+        Summarise where the time of the runs launched so far went, by phase.
+
+        Returns:
+            str: Total and mean seconds per phase, with each phase's share of
+            the total, so that significant harness overhead stands out.
+        """
+        with self._lock:
+            totals, runs = dict(self.phase_totals), self.timed_runs
+
+        overall = sum(totals.values())
+        lines = [f"Phase timings over {runs} run(s), {overall:.2f}s in total:"]
+        for phase in PHASE_FIELDS:
+            if phase in totals:
+                share = 100 * totals[phase] / overall if overall else 0.0
+                lines.append(
+                    f"  {phase.value}: {totals[phase]:.2f}s total,"
+                    f" {totals[phase] / runs:.2f}s mean, {share:.1f}%"
+                )
+        return "\n".join(lines)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop accepting runs and release the worker slots.
+
+        Args:
+            wait (bool): Whether to wait for scheduled runs to finish.
+        """
+        self._executor.shutdown(wait=wait)
+
+        if wait and self.logger is not None and self.timed_runs:
+            self.logger.log_and_print(self.phase_summary())
+
+    def __enter__(self) -> "KleeCampaign":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown(wait=True)
+
+
+def run_campaign(
+    options_list: List[KleeRunOptions],
+    workers: Optional[int] = None,
+    output_root: Optional[str] = None,
+    logger: Optional[ProgressLogger] = None,
+    sandboxes: Optional[SandboxPool] = None,
+    admission: Optional[MemoryAdmission] = None,
+    placement: Optional[CorePlacement] = None,
+    cache: Optional[ResultCache] = None,
+    journal: Optional[CampaignJournal] = None,
+    monitor: Optional[StatsMonitor] = None,
+    reaper: Optional[OutputReaper] = None,
+    scratch: Optional[ScratchSpace] = None,
+    log_compression: Optional[LogCompression] = None,
+    stopping: Optional[CoveragePlateau] = None,
+    record_series: bool = False,
+) -> List[KResult]:
+    """
+    Convenience function to run many KLEE configurations concurrently.
+
+    Args:
+        options_list (List[KleeRunOptions]): Configurations to run.
+        workers (Optional[int]): Number of worker slots, defaulting to the
+            number of CPUs on the machine.
+        output_root (Optional[str]): Directory in which to place each run's
+            output directory.
+        logger (Optional[ProgressLogger]): Logger for progress information.
+        sandboxes (Optional[SandboxPool]): Pool of private sandboxes to run in.
+        admission (Optional[MemoryAdmission]): Memory admission control.
+        placement (Optional[CorePlacement]): Core placement for runs.
+        cache (Optional[ResultCache]): Cache of results of earlier runs.
+        journal (Optional[CampaignJournal]): Journal of the campaign's runs.
+        monitor (Optional[StatsMonitor]): Monitor for live statistics.
+        reaper (Optional[OutputReaper]): Reaper for output directories.
+        scratch (Optional[ScratchSpace]): In-memory space for runs' output.
+        log_compression (Optional[LogCompression]): Query log compression.
+        stopping (Optional[CoveragePlateau]): Policy for stopping runs early.
+        record_series (bool): Whether to attach runs' statistics series.
+
+    Returns:
+        List[KResult]: Results, in the same order as `options_list`.
+    """
+    with KleeCampaign(
+        workers,
+        output_root,
+        logger,
+        sandboxes,
+        admission,
+        placement,
+        cache,
+        journal,
+        monitor,
+        reaper,
+        scratch,
+        log_compression,
+        stopping,
+        record_series,
+    ) as campaign:
+        return campaign.map(options_list)
@@ -0,0 +1,209 @@
+"""A regression corpus of the slowest queries of KLEE runs, for nightly replay."""
+
+from journal import options_key
+from querylog import Codec, iter_queries, open_log, query_commands
+from queryindex import query_hash
+from resources import physical_cores
+from runklee import KleeRunOptions
+from solverbench import BenchmarkSuite, SolverBinary, SuiteQuery, solve
+
+import heapq
+import os
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Iterator, List, Optional, Set, Tuple
+
+
+def time_log(
+    log_path: str,
+    binary: SolverBinary,
+    workers: Optional[int] = None,
+    timeout: float = 60.0,
+    skip: Optional[Set[str]] = None,
+) -> Iterator[Tuple[int, bytes, str, float]]:
+    """
+    Solve every query of a log, holding only a few queries per worker in memory.
+
+    Args:
+        log_path (str): Path to the query log, possibly compressed.
+        binary (SolverBinary): The solver.
+        workers (Optional[int]): Number of solvers run at once, by default one
+            per physical core, so that SMT siblings do not distort timings.
+        timeout (float): Seconds after which a solver is killed.
+        skip (Optional[Set[str]]): `corpus_hash`es of queries not to solve. The
+            hash of each query solved is added, so repeats are solved only once.
+
+    Yields:
+        Tuple[int, bytes, str, float]: The position of each query, the query,
+        its result and its solve time in seconds, as from `solve`, in log order.
+    """
+    workers = workers or len(physical_cores()) or 1
+    pending: Deque[Tuple[int, bytes, "Future[Tuple[str, float]]"]] = deque()
+
+    with open_log(log_path) as log, ThreadPoolExecutor(workers) as pool:
+        for position, query in enumerate(iter_queries(log)):
+            if skip is not None:
+                digest = corpus_hash(query)
+                if digest in skip:
+                    continue
+                skip.add(digest)
+
+            pending.append(
+                (position, query, pool.submit(solve, binary, query, timeout))
+            )
+            if len(pending) > 2 * workers:
+                position, query, future = pending.popleft()
+                yield (position, query, *future.result())
+        while pending:
+            position, query, future = pending.popleft()
+            yield (position, query, *future.result())
+
+
+def corpus_hash(query: bytes) -> str:
+    """
+    Identify a query by its commands, so that it is only added to a corpus once.
+
+    Args:
+        query (bytes): The query.
+
+    Returns:
+        str: A hash of the query's whitespace-normalised commands.
+    """
+    return f"{query_hash(b''.join(query_commands(query))):016x}"
+
+
+def extract_slowest(
+    corpus_root: str,
+    log_path: str,
+    program: str,
+    config: str,
+    binary: SolverBinary,
+    k: int = 10,
+    workers: Optional[int] = None,
+    timeout: float = 60.0,
+) -> List[SuiteQuery]:
+    """
+    Time every query of a log and add the `k` slowest to a corpus.
+
+    Queries are timed afresh rather than ranked by the solver times KLEE recorded,
+    which its caches and incremental solving distort. Queries that time out rank
+    as slowest. Queries already in the corpus, from any run, and repeats of a
+    query within the log are passed over without being solved, so that the corpus
+    keeps growing with the slowest new queries.
+
+    Args:
+        corpus_root (str): The corpus directory, created if it does not exist.
+        log_path (str): Path to the query log, possibly compressed.
+        program (str): Name of the program the log was recorded on.
+        config (str): Identifier of the run configuration, e.g. its `options_key`.
+        binary (SolverBinary): The solver to time queries with.
+        k (int): Number of queries to add at most.
+        workers (Optional[int]): Number of solvers run at once.
+        timeout (float): Seconds after which a solver is killed.
+
+    Returns:
+        List[SuiteQuery]: The queries added, slowest first.
+    """
+    if os.path.exists(os.path.join(corpus_root, BenchmarkSuite.MANIFEST)):
+        corpus = BenchmarkSuite.load(corpus_root)
+    else:
+        corpus = BenchmarkSuite.create(corpus_root)
+    known = {query.meta.get("hash") for query in corpus.queries}
+
+    slowest: List[Tuple[float, int, bytes, str, str]] = []  # A min-heap by time.
+    for position, query, result, seconds in time_log(
+        log_path, binary, workers, timeout, skip=known
+    ):
+        if result == "error":
+            continue
+
+        entry = (seconds, position, query, result, corpus_hash(query))
+        if len(slowest) < k:
+            heapq.heappush(slowest, entry)
+        elif seconds > slowest[0][0]:
+            heapq.heapreplace(slowest, entry)
+
+    added = []
+    for seconds, position, query, result, digest in sorted(slowest, reverse=True):
+        added.append(
+            corpus.add(
+                log_path,
+                position,
+                query,
+                program=program,
+                config=config,
+                solver=binary.name,
+                result=result,
+                seconds=f"{seconds:.6f}",
+                hash=digest,
+            )
+        )
+    corpus.save()
+    return added
+
+
+def extract_run(
+    corpus_root: str,
+    options: KleeRunOptions,
+    k: int = 10,
+    binary: Optional[SolverBinary] = None,
+    workers: Optional[int] = None,
+    timeout: float = 60.0,
+) -> List[SuiteQuery]:
+    """
+    Add the slowest queries of a finished run to a corpus, see `extract_slowest`.
+
+    Args:
+        corpus_root (str): The corpus directory.
+        options (KleeRunOptions): Options of the run, which must set `logFile`.
+            The log may have been compressed by the runner.
+        k (int): Number of queries to add at most.
+        binary (Optional[SolverBinary]): The solver to time queries with, by
+            default the run's solver.
+        workers (Optional[int]): Number of solvers run at once.
+        timeout (float): Seconds after which a solver is killed.
+
+    Returns:
+        List[SuiteQuery]: The queries added, slowest first.
+    """
+    assert options.logFile is not None, "The run did not log its queries"
+
+    candidates = [options.logFile] + [
+        f"{options.logFile}.{codec.value}" for codec in Codec
+    ]
+    log_path = next((path for path in candidates if os.path.exists(path)), None)
+    assert log_path is not None, f"No query log at {options.logFile}"
+
+    return extract_slowest(
+        corpus_root,
+        log_path,
+        options.name,
+        options_key(options),
+        binary or SolverBinary(options.solver),
+        k,
+        workers,
+        timeout,
+    )
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) in (6, 7):
+        added = extract_slowest(
+            sys.argv[1],
+            sys.argv[2],
+            sys.argv[3],
+            sys.argv[4],
+            SolverBinary.parse(sys.argv[5]),
+            *[int(k) for k in sys.argv[6:]],
+        )
+        for query in added:
+            print(f"{query.file}: query {query.position}, {query.meta['seconds']}s")
+    else:
+        print(
+            "Usage: python corpus.py <corpus_dir> <query_log> <program> <config>"
+            " <solver[:binary]> [k]"
+        )
+        sys.exit(1)
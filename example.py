@@ -3,17 +3,24 @@ A short, example benchmarker that compares two KLEE configurations.
 """
 
 from util import ProgressLogger, ResultCSVPrinter
-from runklee import run_klee, KleeRunOptions as opts, SearchStrategy
+from runklee import KleeRunOptions as opts, SearchStrategy
 from kresult import KResult, KResultField
+from campaign import KleeCampaign
+from journal import CampaignJournal
+from pipeline import KleePipeline
+from sandbox import SandboxPool
 
 import typer
-from typing import List
+from contextlib import nullcontext
+from typing import List, Optional
 
 
 def benchmark(
     time_in_mins: float,
     programs: List[str],
     experiment_name: str = "results",
+    journal_file: Optional[str] = None,
+    workers: int = 1,
 ):
     """
     Run a benchmark comparing unoptimized and optimized DFS KLEE runs.
@@ -22,8 +29,14 @@ def benchmark(
         time_in_mins (float): Time limit for each KLEE run in minutes.
         programs (List[str]): List of programs to benchmark.
         experiment_name (str): Name for the experiment results.
+        journal_file (Optional[str]): Journal to resume an interrupted benchmark
+            from. Runs completed before the interruption are not rerun, and
+            their results are written to the (rewritten) results CSV again.
+        workers (int): Number of KLEE runs to execute concurrently, each in a
+            private copy of the sandbox when there are several.
     """
     logger = ProgressLogger()
+    journal = CampaignJournal(journal_file) if journal_file is not None else None
 
     printer = ResultCSVPrinter(
         column_names=["Program", "Unoptimised Time (s)", "Optimised Time (s)"],
@@ -35,10 +48,42 @@ def benchmark(
     # rerunning and getting set instruction values for future experiments.
     query_mismatches, instr_mismatches, instr_list = [], [], []
 
-    for i, program in enumerate(programs):
-        # Baseline KLEE run to get instructions:
-        instrs = (
-            run_klee(
+    def rerun_on_instructions(program: str, dirName: str, caches: bool):
+        # Rerun on the instructions found by the baseline KLEE run.
+        def derive(baseline: KResult) -> opts:
+            return opts(
+                name=program,
+                instructions=instructions_of(baseline),
+                searchStrategy=SearchStrategy.DFS,
+                batchingInstrs=None,
+                memory=2000,
+                dirName=dirName,
+                cex=caches,
+                independent=caches,
+                branch=caches,
+            )
+
+        return derive
+
+    def instructions_of(baseline: KResult) -> int:
+        # Subtract some instructions in case of post-halt overrunning.
+        return baseline.get(KResultField.INSTRUCTIONS) - 200
+
+    # Concurrent runs would otherwise share, and overwrite, /tmp/sandbox.
+    sandboxes = SandboxPool(workers) if workers > 1 else None
+
+    # The journal is closed once the campaign has finished every run.
+    with journal or nullcontext(), KleeCampaign(
+        workers=workers, logger=logger, sandboxes=sandboxes, journal=journal
+    ) as campaign:
+        # Every program's runs form a chain of baseline, then two independent
+        # reruns, so with several workers the programs are benchmarked together.
+        pipeline = KleePipeline(campaign)
+        runs = []
+
+        for program in programs:
+            # Baseline KLEE run to get instructions:
+            baseline = pipeline.add(
                 opts(
                     name=program,
                     timeToRun=int(time_in_mins * 60),
@@ -49,79 +94,62 @@ def benchmark(
                     cex=False,
                     independent=False,
                     branch=False,
-                ),
-                logger=logger,
-            ).get(KResultField.INSTRUCTIONS)
-            - 200  # Subtract some instructions in case of post-halt overrunning.
-        )
+                )
+            )
 
-        instr_list.append(instrs)
+            # Rerun baseline, and run testee, on found instructions.
+            unOpt = pipeline.then(
+                baseline, rerun_on_instructions(program, "unoptimised-output", False)
+            )
+            opt = pipeline.then(
+                baseline, rerun_on_instructions(program, "optimised-output", True)
+            )
 
-        # Rerun baseline on found instructions.
-        unOptResults: KResult = run_klee(
-            opts(
-                name=program,
-                instructions=instrs,
-                searchStrategy=SearchStrategy.DFS,
-                batchingInstrs=None,
-                memory=2000,
-                dirName="unoptimised-output",
-                cex=False,
-                independent=False,
-                branch=False,
-            ),
-            logger=logger,
-        )
-
-        # Run testee on found instructions.
-        optResults: KResult = run_klee(
-            opts(
-                name=program,
-                instructions=instrs,
-                searchStrategy=SearchStrategy.DFS,
-                batchingInstrs=None,
-                memory=2000,
-                dirName="optimised-output",
-            ),
-            logger=logger,
-        )
-
-        if unOptResults.get(KResultField.QUERIES) != optResults.get(
-            KResultField.QUERIES
-        ):
-            query_mismatches.append(
-                (
-                    program,
-                    unOptResults.get(KResultField.QUERIES),
-                    optResults.get(KResultField.QUERIES),
+            runs.append((program, baseline, unOpt, opt))
+
+        # Report in program order, while later programs' runs continue.
+        for i, (program, baseline, unOpt, opt) in enumerate(runs):
+            instr_list.append(instructions_of(baseline.result()))
+
+            unOptResults: KResult = unOpt.result()
+            optResults: KResult = opt.result()
+
+            if unOptResults.get(KResultField.QUERIES) != optResults.get(
+                KResultField.QUERIES
+            ):
+                query_mismatches.append(
+                    (
+                        program,
+                        unOptResults.get(KResultField.QUERIES),
+                        optResults.get(KResultField.QUERIES),
+                    )
                 )
-            )
 
-        if unOptResults.get(KResultField.INSTRUCTIONS) != optResults.get(
-            KResultField.INSTRUCTIONS
-        ):
-            instr_mismatches.append(
-                (
-                    program,
-                    unOptResults.get(KResultField.INSTRUCTIONS),
-                    optResults.get(KResultField.INSTRUCTIONS),
+            if unOptResults.get(KResultField.INSTRUCTIONS) != optResults.get(
+                KResultField.INSTRUCTIONS
+            ):
+                instr_mismatches.append(
+                    (
+                        program,
+                        unOptResults.get(KResultField.INSTRUCTIONS),
+                        optResults.get(KResultField.INSTRUCTIONS),
+                    )
                 )
-            )
 
-        logger.log_and_print(
-            f"""Results for {program} ({i + 1} / {len(programs)}):
+            logger.log_and_print(
+                f"""Results for {program} ({i + 1} / {len(programs)}):
     - (First Time: {unOptResults.get(KResultField.TIME)}, Second Time: {optResults.get(KResultField.TIME)})
     - Current query mismatches: {query_mismatches}
     - Current instruction mismatches: {instr_mismatches}"""
-        )
-
-        printer.write_row(
-            [
-                program,
-                unOptResults.get(KResultField.TIME),
-                optResults.get(KResultField.TIME),
-            ]
-        )
+            )
+
+            printer.write_row(
+                [
+                    program,
+                    unOptResults.get(KResultField.TIME),
+                    optResults.get(KResultField.TIME),
+                ]
+            )
 
     logger.log_and_print(f"Printing results...\n{printer.read()}")
     logger.log_and_print(f"Printing instruction list:\n{instr_list}")
@@ -0,0 +1,162 @@
+"""A crash-resumable journal of the runs in a campaign."""
+
+from kresult import KResult
+from runklee import KleeRunOptions
+
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+
+from typing import Dict, Optional
+
+
+def options_key(options: KleeRunOptions) -> str:
+    """
+    Get a stable identifier of a run configuration, that survives restarts.
+
+    Args:
+        options (KleeRunOptions): Configuration options for the KLEE run.
+
+    Returns:
+        str: A hash of every configuration option.
+    """
+    material = json.dumps(
+        dataclasses.asdict(options), sort_keys=True, default=lambda e: e.value
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class CampaignJournal:
+    """
+    An append-only journal of planned and completed runs, with their results.
+
+    Every record is a JSON line that is flushed and fsync'd before the call that
+    wrote it returns, so a campaign killed at any point loses at most the runs that
+    were in flight. Reopening the journal replays completed runs, so that a
+    restarted campaign skips finished work. Repeated submissions of an identical
+    configuration, such as timing repetitions, are told apart by their repetition
+    number: how many times the configuration was submitted before in the same
+    process. Each repetition is then run once per journal.
+
+    Attributes:
+        path (str): Path to the journal file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the CampaignJournal, loading any records already present.
+
+        Args:
+            path (str): Path to the journal file, created if it does not exist.
+        """
+        self.path = path
+        self._completed: Dict[str, KResult] = {}
+        self._repetitions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "rb+") as f:
+                data = f.read()
+                # Drop a torn final record left by a crash mid-write.
+                intact = data[: data.rfind(b"\n") + 1]
+                f.truncate(len(intact))
+
+            for line in intact.decode().splitlines():
+                record = json.loads(line)
+                if record["event"] == "completed":
+                    self._completed[record["key"]] = KResult(record["result"])
+
+        self._file = open(path, "a")
+
+    def _append(self, record: Dict) -> None:
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    @staticmethod
+    def _key(options: KleeRunOptions, repetition: int) -> str:
+        key = options_key(options)
+        return key if repetition == 0 else f"{key}-{repetition}"
+
+    def repetition(self, options: KleeRunOptions) -> int:
+        """
+        Number a submission of a run, counting earlier submissions of the same
+        configuration in this process, so that repetitions are journaled apart.
+
+        Args:
+            options (KleeRunOptions): Configuration options for the KLEE run.
+
+        Returns:
+            int: The repetition number, from 0.
+        """
+        key = options_key(options)
+        with self._lock:
+            repetition = self._repetitions.get(key, 0)
+            self._repetitions[key] = repetition + 1
+        return repetition
+
+    def completed(
+        self, options: KleeRunOptions, repetition: int = 0
+    ) -> Optional[KResult]:
+        """
+        Get the results of a run completed before, possibly by an earlier process.
+
+        Args:
+            options (KleeRunOptions): Configuration options for the KLEE run.
+            repetition (int): The run's repetition number, see `repetition`.
+
+        Returns:
+            Optional[KResult]: The recorded results, or None if not yet completed.
+        """
+        return self._completed.get(self._key(options, repetition))
+
+    def plan(self, options: KleeRunOptions, repetition: int = 0) -> None:
+        """
+        Record that a run is about to start.
+
+        Args:
+            options (KleeRunOptions): Configuration options for the KLEE run.
+            repetition (int): The run's repetition number, see `repetition`.
+        """
+        self._append(
+            {
+                "event": "planned",
+                "key": self._key(options, repetition),
+                "name": options.name,
+            }
+        )
+
+    def complete(
+        self, options: KleeRunOptions, results: KResult, repetition: int = 0
+    ) -> None:
+        """
+        Durably record the results of a finished run.
+
+        Args:
+            options (KleeRunOptions): Configuration options for the KLEE run.
+            results (KResult): The results of the KLEE run.
+            repetition (int): The run's repetition number, see `repetition`.
+        """
+        key = self._key(options, repetition)
+        self._append(
+            {
+                "event": "completed",
+                "key": key,
+                "name": options.name,
+                "result": json.loads(results.to_json()),
+            }
+        )
+        self._completed[key] = results
+
+    def close(self) -> None:
+        """Close the journal file."""
+        self._file.close()
+
+    def __enter__(self) -> "CampaignJournal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
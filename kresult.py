@@ -3,7 +3,10 @@
 import json
 
 from enum import Enum
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+
+if TYPE_CHECKING:
+    from kseries import KResultSeries
 
 
 class KResultField(Enum):
@@ -68,8 +71,42 @@ class KResultField(Enum):
     TUSER_PERCENT = "TUser(%)"
 
 
+class KRunField(Enum):
+    """Enumeration of fields recorded by the harness alongside KLEE's results."""
+
+    CPUS = "CPUs"
+    NUMA_NODE = "NUMANode"
+    CACHED = "Cached"
+    STOP_REASON = "StopReason"
+    STOP_TIME = "StopTime(s)"
+    OS_USER_SECONDS = "OSUser(s)"
+    OS_SYS_SECONDS = "OSSys(s)"
+    PEAK_RSS_MIB = "PeakRSS(MiB)"
+    MAJOR_FAULTS = "MajorFaults"
+    VOLUNTARY_SWITCHES = "VolCtxSwitches"
+    INVOLUNTARY_SWITCHES = "InvolCtxSwitches"
+    READ_BYTES = "ReadBytes"
+    WRITE_BYTES = "WriteBytes"
+    TPREPARE_SECONDS = "TPrepare(s)"
+    TKLEE_SECONDS = "TKlee(s)"
+    TSTATS_SECONDS = "TStats(s)"
+    TPARSE_SECONDS = "TParse(s)"
+    TCLEANUP_SECONDS = "TCleanup(s)"
+
+
+# Harness fields holding text, even where it looks like a number: CPUs are
+# always a comma-separated list, like "3" or "2,3".
+TEXT_FIELDS = {KRunField.CPUS, KRunField.STOP_REASON}
+
+
 class KResult(object):
-    """A class to represent KLEE execution results."""
+    """
+    A class to represent KLEE execution results.
+
+    Attributes:
+        series (Optional[KResultSeries]): Every statistics snapshot of the run,
+            if the run recorded them.
+    """
 
     def __init__(self, data: Dict[str, Any]):
         """
@@ -80,18 +117,42 @@ class KResult(object):
             as output by `klee-stats`.
         """
         self._data = data
+        self.series: Optional["KResultSeries"] = None
 
-    def get(self, field: KResultField) -> Any:
+    def get(self, field: Union[KResultField, KRunField]) -> Any:
         """
         Retrieve a value from the KLEE result data.
 
         Args:
-            field (KResultField): The field to retrieve.
+            field (Union[KResultField, KRunField]): The field to retrieve.
 
         Returns:
-            Any: The value associated with the given field, parsed appropriately.
+            Any: The value associated with the given field, parsed appropriately,
+            or None if the field was not recorded.
+        """
+        value = self._data.get(field.value)
+        if value is None or field in TEXT_FIELDS:
+            return value
+        return self._parse_value(value)
+
+    def set(self, field: KRunField, value: Any) -> None:
+        """
+        Record a harness-side value next to the KLEE result data.
+
+        Args:
+            field (KRunField): The field to record.
+            value (Any): The value, stored in string form like `klee-stats` data.
         """
-        return self._parse_value(self._data.get(field.value))
+        self._data[field.value] = str(value)
+
+    def unset(self, field: KRunField) -> None:
+        """
+        Remove a harness-side value, if it was recorded.
+
+        Args:
+            field (KRunField): The field to remove.
+        """
+        self._data.pop(field.value, None)
 
     def to_json(self) -> str:
         """
@@ -102,6 +163,33 @@ class KResult(object):
         """
         return json.dumps(self._data, indent=2)
 
+    def to_csv(self, csv_path: str) -> None:
+        """
+        Write the KLEE result data to a CSV file, in the format of `klee-stats`.
+
+        Args:
+            csv_path (str): The path to the CSV file to write.
+        """
+        import csv
+
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(self._data))
+            writer.writeheader()
+            writer.writerow(self._data)
+
+    @classmethod
+    def from_json(cls, json_str: str) -> "KResult":
+        """
+        Create a KResult instance from a JSON string produced by `to_json`.
+
+        Args:
+            json_str (str): A JSON representation of KLEE result data.
+
+        Returns:
+            KResult: A new KResult instance created from the JSON data.
+        """
+        return cls(json.loads(json_str))
+
     @classmethod
     def from_csv(cls, csv_path: str) -> "KResult":
         """
@@ -0,0 +1,267 @@
+"""Time series of every statistics snapshot KLEE recorded during a run."""
+
+from kresult import KResult, KResultField
+from kstats import AGGREGATES, COLUMNS, Row, format_value, read_run_stats
+
+import numpy as np
+
+from typing import Dict, List, Optional, Sequence
+
+
+class KResultSeries:
+    """
+    Every run.stats snapshot of a KLEE run, held column-wise in NumPy arrays.
+
+    Each KResultField recorded by this KLEE version has one array, with one entry
+    per snapshot, derived as `klee-stats` would derive it from that snapshot (so
+    MaxActiveStates, say, is the running maximum up to each snapshot).
+
+    Attributes:
+        times (np.ndarray): Wall-clock time, in seconds, of each snapshot.
+    """
+
+    def __init__(self, columns: Dict[KResultField, np.ndarray]):
+        """
+        Initialize a KResultSeries instance.
+
+        Args:
+            columns (Dict[KResultField, np.ndarray]): One array per field, all of
+            the same length and ordered by time.
+        """
+        self._columns = columns
+        self.times = columns[KResultField.TIME]
+
+    @classmethod
+    def from_rows(cls, rows: List[Row]) -> "KResultSeries":
+        """
+        Create a KResultSeries from run.stats snapshots.
+
+        Args:
+            rows (List[Row]): Snapshots, as returned by `kstats.read_run_stats`.
+
+        Returns:
+            KResultSeries: A new KResultSeries of the snapshots.
+
+        Raises:
+            ValueError: If there are no snapshots.
+        """
+        if not rows:
+            raise ValueError("No statistics snapshots to build a series from")
+
+        stats = {name: np.array([row[name] for row in rows]) for name in rows[0]}
+        columns = {}
+
+        # Snapshots without branches count one fully covered branch, as in `kstats`.
+        if "NumBranches" in stats:
+            straight = stats["NumBranches"] == 0
+            for name in ("NumBranches", "FullBranches"):
+                stats[name] = np.where(straight, 1, stats[name])
+
+        # Division by a zero counter early in a run yields 0, as in `kstats`.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for field, column in COLUMNS.items():
+                try:
+                    values = np.asarray(column(stats))
+                except KeyError:
+                    continue
+                if values.dtype.kind == "f":
+                    values = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+                columns[field] = values
+
+        for field, (stat, aggregate, scale) in AGGREGATES.items():
+            if stat in stats:
+                if aggregate == "max":
+                    values = np.maximum.accumulate(stats[stat])
+                else:
+                    values = np.cumsum(stats[stat]) / np.arange(1, len(rows) + 1)
+                columns[field] = values * scale
+
+        return cls(columns)
+
+    @classmethod
+    def from_run_stats(cls, output_dir: str) -> "KResultSeries":
+        """
+        Create a KResultSeries from a KLEE output directory's run.stats.
+
+        Args:
+            output_dir (str): The KLEE output directory.
+
+        Returns:
+            KResultSeries: A new KResultSeries of the run's snapshots.
+        """
+        return cls.from_rows(read_run_stats(output_dir))
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def fields(self) -> List[KResultField]:
+        """The fields recorded in this series."""
+        return list(self._columns)
+
+    def get(self, field: KResultField) -> np.ndarray:
+        """
+        Retrieve the values of a field across all snapshots.
+
+        Args:
+            field (KResultField): The field to retrieve.
+
+        Returns:
+            np.ndarray: One value per snapshot.
+
+        Raises:
+            KeyError: If this KLEE version does not record the field.
+        """
+        return self._columns[field]
+
+    def index_at(self, time: float) -> int:
+        """
+        Find the last snapshot taken at or before a point in time.
+
+        Args:
+            time (float): Wall-clock time into the run, in seconds.
+
+        Returns:
+            int: Index of the snapshot.
+
+        Raises:
+            ValueError: If `time` precedes the first snapshot.
+        """
+        index = int(np.searchsorted(self.times, time, side="right")) - 1
+        if index < 0:
+            raise ValueError(f"No snapshot at or before {time}s")
+        return index
+
+    def value_at(self, field: KResultField, time: float) -> float:
+        """
+        Get a field's value at a point in time, e.g. "ICov(%) at t=300s".
+
+        Args:
+            field (KResultField): The field to retrieve.
+            time (float): Wall-clock time into the run, in seconds.
+
+        Returns:
+            float: The value in the last snapshot at or before `time`.
+        """
+        return self.get(field)[self.index_at(time)].item()
+
+    def first_time_reaching(
+        self, field: KResultField, threshold: float
+    ) -> Optional[float]:
+        """
+        Find when a field first reached a threshold, e.g. "BCov(%) reached 60".
+
+        Args:
+            field (KResultField): The field to inspect.
+            threshold (float): The value to reach.
+
+        Returns:
+            Optional[float]: Wall-clock time of the first snapshot at or above
+            `threshold`, or None if it was never reached.
+        """
+        reached = self.get(field) >= threshold
+        if not reached.any():
+            return None
+        return self.times[int(np.argmax(reached))].item()
+
+    def rate(
+        self, field: KResultField, window: float = 60.0, end: Optional[float] = None
+    ) -> float:
+        """
+        Get a field's rate of change over a window, e.g. instructions per second.
+
+        Args:
+            field (KResultField): The field to inspect.
+            window (float): Length of the window, in seconds.
+            end (Optional[float]): End of the window, defaulting to the final
+                snapshot.
+
+        Returns:
+            float: Change per second between the snapshots bounding the window,
+            or 0 if they coincide.
+        """
+        if end is None:
+            end = self.times[-1].item()
+
+        last = self.index_at(end)
+        first = self.index_at(max(end - window, self.times[0].item()))
+        elapsed = (self.times[last] - self.times[first]).item()
+
+        values = self.get(field)
+        return (values[last] - values[first]).item() / elapsed if elapsed else 0.0
+
+    def snapshot(self, index: int) -> KResult:
+        """
+        Get a single snapshot as a KResult, as if the run had stopped there.
+
+        Args:
+            index (int): Index of the snapshot.
+
+        Returns:
+            KResult: The results at that snapshot.
+        """
+        return KResult(
+            {
+                field.value: format_value(values[index].item())
+                for field, values in self._columns.items()
+            }
+        )
+
+    def _snapshots_at(
+        self, axis: np.ndarray, points: Sequence[float], interpolate: bool
+    ) -> List[KResult]:
+        indices = np.searchsorted(axis, points, side="right") - 1
+        if (indices < 0).any():
+            raise ValueError("Checkpoints must not precede the first snapshot")
+
+        if not interpolate:
+            return [self.snapshot(int(index)) for index in indices]
+
+        snapshots = []
+        for point in points:
+            data = {}
+            for field, values in self._columns.items():
+                value = np.interp(point, axis, values).item()
+                if values.dtype.kind in "iu":
+                    value = round(value)  # Counters stay whole.
+                data[field.value] = format_value(value)
+            snapshots.append(KResult(data))
+        return snapshots
+
+    def at_times(
+        self, times: Sequence[float], interpolate: bool = False
+    ) -> List[KResult]:
+        """
+        Get results at several wall-clock budgets, from this one run.
+
+        Checkpoints past the final snapshot yield the final results, since the
+        run had already ended by then.
+
+        Args:
+            times (Sequence[float]): Wall-clock checkpoints, in seconds.
+            interpolate (bool): Whether to interpolate linearly between the
+                snapshots around each checkpoint, rather than taking the last
+                snapshot at or before it.
+
+        Returns:
+            List[KResult]: Results at each checkpoint, in order.
+        """
+        return self._snapshots_at(self.times, times, interpolate)
+
+    def at_instructions(
+        self, instructions: Sequence[int], interpolate: bool = False
+    ) -> List[KResult]:
+        """
+        Get results at several instruction budgets, from this one run.
+
+        Args:
+            instructions (Sequence[int]): Instruction checkpoints.
+            interpolate (bool): Whether to interpolate linearly between the
+                snapshots around each checkpoint, rather than taking the last
+                snapshot at or before it.
+
+        Returns:
+            List[KResult]: Results at each checkpoint, in order.
+        """
+        axis = self.get(KResultField.INSTRUCTIONS)
+        return self._snapshots_at(axis, instructions, interpolate)
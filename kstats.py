@@ -0,0 +1,230 @@
+"""Read KLEE's run.stats database directly, without spawning `klee-stats`."""
+
+from kresult import KResult, KResultField
+
+import os
+import sqlite3
+import statistics
+import urllib.parse
+
+from contextlib import closing
+from typing import Any, Callable, Dict, List, Tuple
+
+Row = Dict[str, Any]
+
+# How `klee-stats --print-all` derives each column from a row of run.stats.
+# Times are recorded in microseconds and memory in bytes.
+COLUMNS: Dict[KResultField, Callable[[Row], Any]] = {
+    KResultField.TIME: lambda r: r["WallTime"] / 1e6,
+    KResultField.INSTRUCTIONS: lambda r: r["Instructions"],
+    KResultField.ICOV_PERCENT: lambda r: (
+        100
+        * r["CoveredInstructions"]
+        / (r["CoveredInstructions"] + r["UncoveredInstructions"])
+    ),
+    KResultField.BCOV_PERCENT: lambda r: (
+        100 * (2 * r["FullBranches"] + r["PartialBranches"]) / (2 * r["NumBranches"])
+    ),
+    KResultField.ICOUNT: lambda r: (
+        r["CoveredInstructions"] + r["UncoveredInstructions"]
+    ),
+    KResultField.TSOLVER_PERCENT: lambda r: 100 * r["SolverTime"] / r["WallTime"],
+    KResultField.ICOVERED: lambda r: r["CoveredInstructions"],
+    KResultField.IUNCOVERED: lambda r: r["UncoveredInstructions"],
+    KResultField.BRANCHES: lambda r: r["NumBranches"],
+    KResultField.FULL_BRANCHES: lambda r: r["FullBranches"],
+    KResultField.PARTIAL_BRANCHES: lambda r: r["PartialBranches"],
+    KResultField.EXTERNAL_CALLS: lambda r: r["ExternalCalls"],
+    KResultField.TUSER_SECONDS: lambda r: r["UserTime"] / 1e6,
+    KResultField.TRESOLVE_SECONDS: lambda r: r["ResolveTime"] / 1e6,
+    KResultField.TRESOLVE_PERCENT: lambda r: 100 * r["ResolveTime"] / r["WallTime"],
+    KResultField.TCEX_SECONDS: lambda r: r["CexCacheTime"] / 1e6,
+    KResultField.TCEX_PERCENT: lambda r: 100 * r["CexCacheTime"] / r["WallTime"],
+    KResultField.TQUERY_SECONDS: lambda r: r["QueryTime"] / 1e6,
+    KResultField.TSOLVER_SECONDS: lambda r: r["SolverTime"] / 1e6,
+    KResultField.STATES: lambda r: r["States"],
+    KResultField.ACTIVE_STATES: lambda r: r["NumStates"],
+    KResultField.INHIBITED_FORKS: lambda r: r["InhibitedForks"],
+    KResultField.QUERIES: lambda r: r["NumQueries"],
+    KResultField.SOLVER_QUERIES: lambda r: r["SolverQueries"],
+    KResultField.SOLVER_QUERY_CONSTRUCTS: lambda r: r["NumQueryConstructs"],
+    KResultField.QCACHE_MISSES: lambda r: r["QueryCacheMisses"],
+    KResultField.QCACHE_HITS: lambda r: r["QueryCacheHits"],
+    KResultField.QCEX_CACHE_MISSES: lambda r: r["QueryCexCacheMisses"],
+    KResultField.QCEX_CACHE_HITS: lambda r: r["QueryCexCacheHits"],
+    KResultField.ALLOCATIONS: lambda r: r["Allocations"],
+    KResultField.MEM_MIB: lambda r: r["MallocUsage"] / 1024 / 1024,
+    KResultField.BR_CONDITIONAL: lambda r: r["BranchesConditional"],
+    KResultField.BR_INDIRECT: lambda r: r["BranchesIndirect"],
+    KResultField.BR_SWITCH: lambda r: r["BranchesSwitch"],
+    KResultField.BR_CALL: lambda r: r["BranchesCall"],
+    KResultField.BR_MEM_OP: lambda r: r["BranchesMemOp"],
+    KResultField.BR_RESOLVE_POINTER: lambda r: r["BranchesResolvePointer"],
+    KResultField.BR_ALLOC: lambda r: r["BranchesAlloc"],
+    KResultField.BR_REALLOC: lambda r: r["BranchesRealloc"],
+    KResultField.BR_FREE: lambda r: r["BranchesFree"],
+    KResultField.BR_GET_VAL: lambda r: r["BranchesGetVal"],
+    KResultField.TERM_EXIT: lambda r: r["TerminationExit"],
+    KResultField.TERM_EARLY: lambda r: r["TerminationEarly"],
+    KResultField.TERM_SOLVER_ERR: lambda r: r["TerminationSolverError"],
+    KResultField.TERM_PROGR_ERR: lambda r: r["TerminationProgramError"],
+    KResultField.TERM_USER_ERR: lambda r: r["TerminationUserError"],
+    KResultField.TERM_EXEC_ERR: lambda r: r["TerminationExecutionError"],
+    KResultField.TERM_EARLY_ALGO: lambda r: r["TerminationEarlyAlgorithm"],
+    KResultField.TERM_EARLY_USER: lambda r: r["TerminationEarlyUser"],
+    KResultField.TARRAY_HASH_SECONDS: lambda r: r["ArrayHashTime"] / 1e6,
+    KResultField.TFORK_SECONDS: lambda r: r["ForkTime"] / 1e6,
+    KResultField.TFORK_PERCENT: lambda r: 100 * r["ForkTime"] / r["WallTime"],
+    KResultField.TUSER_PERCENT: lambda r: 100 * r["UserTime"] / r["WallTime"],
+}
+
+# Columns that `klee-stats` aggregates over every row: (stat, aggregate, scale).
+AGGREGATES: Dict[KResultField, Tuple[str, str, float]] = {
+    KResultField.MAX_ACTIVE_STATES: ("NumStates", "max", 1),
+    KResultField.AVG_ACTIVE_STATES: ("NumStates", "avg", 1),
+    KResultField.MAX_MEM_MIB: ("MallocUsage", "max", 1 / 1024 / 1024),
+    KResultField.AVG_MEM_MIB: ("MallocUsage", "avg", 1 / 1024 / 1024),
+}
+
+
+def run_stats_path(output_dir: str) -> str:
+    """
+    Get the path to the run.stats database of a KLEE output directory.
+
+    Args:
+        output_dir (str): The KLEE output directory.
+
+    Returns:
+        str: Path to the run.stats database.
+    """
+    return os.path.join(output_dir, "run.stats")
+
+
+def connect_read_only(path: str) -> sqlite3.Connection:
+    """
+    Open an SQLite database for reading, without ever writing to it.
+
+    Args:
+        path (str): Path to the database.
+
+    Returns:
+        sqlite3.Connection: A read-only connection with rows accessible by name.
+
+    Raises:
+        sqlite3.OperationalError: If the database does not exist.
+    """
+    uri = f"file:{urllib.parse.quote(os.path.abspath(path))}?mode=ro"
+    connection = sqlite3.connect(uri, uri=True)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def read_run_stats(output_dir: str) -> List[Row]:
+    """
+    Read every statistics snapshot that KLEE recorded for a run.
+
+    Args:
+        output_dir (str): The KLEE output directory.
+
+    Returns:
+        List[Row]: Snapshots in the order they were recorded, as column dicts.
+    """
+    with closing(connect_read_only(run_stats_path(output_dir))) as connection:
+        rows = connection.execute("SELECT * FROM stats ORDER BY rowid").fetchall()
+    return [dict(row) for row in rows]
+
+
+def count_straight_line(row: Row) -> Row:
+    """
+    Count a run without branches as having one fully covered branch, as
+    `klee-stats` does, so that straight-line code reports 100% branch coverage.
+
+    Args:
+        row (Row): A snapshot, as returned by `read_run_stats`.
+
+    Returns:
+        Row: The snapshot, adjusted if it records no branches.
+    """
+    if row.get("NumBranches") == 0:
+        row = dict(row, NumBranches=1, FullBranches=1)
+    return row
+
+
+def format_value(value: Any) -> str:
+    """
+    Format a statistic as `klee-stats` prints it, with two decimal places.
+
+    Args:
+        value (Any): The value to format.
+
+    Returns:
+        str: The formatted value.
+    """
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+
+def kresult_from_rows(rows: List[Row], path: str) -> KResult:
+    """
+    Summarise snapshots into a KResult, as `klee-stats` does for the final row.
+
+    Fields whose statistics this KLEE version does not record are left out.
+    Shares of a zero wall time or instruction count are 0, as in `klee-stats`.
+
+    Args:
+        rows (List[Row]): Snapshots, as returned by `read_run_stats`.
+        path (str): The KLEE output directory, reported in the "Path" column.
+
+    Returns:
+        KResult: The results of the run.
+
+    Raises:
+        ValueError: If there are no snapshots.
+    """
+    if not rows:
+        raise ValueError(f"No statistics recorded in {path}")
+
+    data = {"Path": path}
+    final = count_straight_line(rows[-1])
+
+    for field, column in COLUMNS.items():
+        try:
+            data[field.value] = format_value(column(final))
+        except KeyError:
+            continue
+        except ZeroDivisionError:
+            data[field.value] = format_value(0.0)
+
+    for field, (stat, aggregate, scale) in AGGREGATES.items():
+        if stat in final:
+            values = [row[stat] for row in rows]
+            value = max(values) if aggregate == "max" else statistics.fmean(values)
+            data[field.value] = format_value(value * scale)
+
+    return KResult(data)
+
+
+def kresult_from_run_stats(output_dir: str) -> KResult:
+    """
+    Create a KResult from a KLEE output directory's run.stats, in-process.
+
+    Args:
+        output_dir (str): The KLEE output directory.
+
+    Returns:
+        KResult: The results of the run.
+
+    Raises:
+        sqlite3.Error: If run.stats is missing or cannot be read.
+        ValueError: If run.stats holds no snapshots.
+    """
+    return kresult_from_rows(read_run_stats(output_dir), output_dir)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) == 2:
+        print(kresult_from_run_stats(sys.argv[1]).to_json())
+    else:
+        print("Usage: python kstats.py <klee_output_dir>")
+        sys.exit(1)
@@ -0,0 +1,255 @@
+"""Live monitoring of a running KLEE through its run.stats database."""
+
+from kresult import KResult, KResultField
+from kstats import connect_read_only, kresult_from_rows, run_stats_path
+from util import ProgressLogger
+
+import sqlite3
+import threading
+import time
+
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Sequence
+
+
+@dataclass
+class StatsUpdate:
+    """The latest statistics of a running KLEE, as seen by a StatsMonitor."""
+
+    name: str  # Name of the program under test.
+    result: KResult  # Statistics of the latest snapshot.
+    idle: float  # Seconds since the instruction count last increased.
+    stalled: bool  # Whether `idle` has reached the monitor's stall threshold.
+
+
+StatsCallback = Callable[[StatsUpdate], None]
+
+
+def read_latest(output_dir: str) -> Optional[KResult]:
+    """
+    Read the latest snapshot of a possibly still running KLEE.
+
+    Reads go through a fresh read-only connection, so they never block KLEE's
+    writes and always see its latest committed snapshot, in WAL mode or not.
+
+    Args:
+        output_dir (str): The KLEE output directory.
+
+    Returns:
+        Optional[KResult]: Statistics of the latest snapshot, or None if there is
+        none yet or the database is momentarily unreadable.
+    """
+    try:
+        with closing(connect_read_only(run_stats_path(output_dir))) as connection:
+            row = connection.execute(
+                "SELECT * FROM stats ORDER BY rowid DESC LIMIT 1"
+            ).fetchone()
+    except sqlite3.Error:
+        return None  # Not created yet, or locked mid-write.
+
+    return None if row is None else kresult_from_rows([dict(row)], output_dir)
+
+
+class StatsMonitor:
+    """
+    Polls the run.stats of running KLEEs, publishing progress as it happens.
+
+    One monitor may watch many runs at once, each from its own background thread.
+    Every poll publishes instructions, coverage, active states, memory and solver
+    share to the callbacks and the logger's file, and flags runs whose instruction
+    count has not increased for `stall_after` seconds. Only changes of state (a
+    run's first update, and it stalling or resuming) are also printed, so that
+    long campaigns do not flood the console.
+
+    Attributes:
+        interval (float): Seconds between polls.
+        stall_after (Optional[float]): Seconds without instruction progress after
+            which a run is reported as stalled, or None to never report stalls.
+        callbacks (List[StatsCallback]): Called with every update.
+    """
+
+    def __init__(
+        self,
+        interval: float = 10.0,
+        stall_after: Optional[float] = None,
+        callbacks: Optional[List[StatsCallback]] = None,
+    ):
+        """
+        Initialize the StatsMonitor.
+
+        Args:
+            interval (float): Seconds between polls.
+            stall_after (Optional[float]): Seconds without instruction progress
+                after which a run is reported as stalled.
+            callbacks (Optional[List[StatsCallback]]): Called with every update.
+        """
+        self.interval = interval
+        self.stall_after = stall_after
+        self.callbacks = list(callbacks or [])
+
+    @staticmethod
+    def describe(update: StatsUpdate) -> str:
+        """
+        Summarise an update in one line.
+
+        Args:
+            update (StatsUpdate): The update to summarise.
+
+        Returns:
+            str: A human-readable summary.
+        """
+        r = update.result
+        summary = (
+            f"[{update.name}] {r.get(KResultField.TIME)}s:"
+            f" {r.get(KResultField.INSTRUCTIONS)} instrs,"
+            f" ICov {r.get(KResultField.ICOV_PERCENT)}%,"
+            f" BCov {r.get(KResultField.BCOV_PERCENT)}%,"
+            f" {r.get(KResultField.ACTIVE_STATES)} active states,"
+            f" {r.get(KResultField.MEM_MIB)} MiB,"
+            f" solver {r.get(KResultField.TSOLVER_PERCENT)}%"
+        )
+        if update.stalled:
+            summary += f" - STALLED, no progress for {update.idle:.0f}s"
+        return summary
+
+    def _poll(
+        self,
+        name: str,
+        output_dir: str,
+        logger: Optional[ProgressLogger],
+        callback: Optional[StatsCallback],
+        stop: threading.Event,
+    ) -> None:
+        last_instructions, last_progress = None, time.monotonic()
+        was_stalled: Optional[bool] = None  # None until the first update.
+
+        while not stop.wait(self.interval):
+            result = read_latest(output_dir)
+            if result is None:
+                continue
+
+            now = time.monotonic()
+            instructions = result.get(KResultField.INSTRUCTIONS)
+            if instructions != last_instructions:
+                last_instructions, last_progress = instructions, now
+
+            idle = now - last_progress
+            stalled = self.stall_after is not None and idle >= self.stall_after
+            update = StatsUpdate(name, result, idle, stalled)
+
+            if logger is not None:
+                if stalled != was_stalled:
+                    logger.log_and_print(self.describe(update))
+                else:
+                    logger.log(self.describe(update))
+            was_stalled = stalled
+            for publish in self.callbacks + ([callback] if callback else []):
+                publish(update)
+
+    @contextmanager
+    def watch(
+        self,
+        name: str,
+        output_dir: str,
+        logger: Optional[ProgressLogger] = None,
+        callback: Optional[StatsCallback] = None,
+    ) -> Iterator[None]:
+        """
+        Context manager that polls a run's statistics for its duration.
+
+        Args:
+            name (str): Name of the program under test.
+            output_dir (str): The KLEE output directory.
+            logger (Optional[ProgressLogger]): Logger to publish updates to.
+            callback (Optional[StatsCallback]): Called with this run's updates
+                only, after the monitor's own callbacks.
+        """
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._poll,
+            args=(name, output_dir, logger, callback, stop),
+            name=f"klee-monitor-{name}",
+            daemon=True,
+        )
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+class CoveragePlateau:
+    """
+    Stopping policy that halts runs whose coverage has stopped improving.
+
+    A run is stopped once none of the watched coverage fields has improved by more
+    than `threshold` percentage points over the last `window` seconds of KLEE's
+    own wall-clock time, so that timing is unaffected by polling jitter.
+
+    Attributes:
+        window (float): Length of the sliding window, in seconds.
+        threshold (float): Improvement, in percentage points, that resets it.
+        interval (float): Seconds between polls, when the runner has no monitor.
+        fields (Sequence[KResultField]): Coverage fields to watch.
+    """
+
+    def __init__(
+        self,
+        window: float = 300.0,
+        threshold: float = 0.0,
+        interval: float = 10.0,
+        fields: Sequence[KResultField] = (
+            KResultField.ICOV_PERCENT,
+            KResultField.BCOV_PERCENT,
+        ),
+    ):
+        """
+        Initialize the CoveragePlateau.
+
+        Args:
+            window (float): Length of the sliding window, in seconds.
+            threshold (float): Improvement, in percentage points, needed within
+                the window for a run to continue.
+            interval (float): Seconds between polls, when the runner has no
+                monitor of its own.
+            fields (Sequence[KResultField]): Coverage fields to watch.
+        """
+        assert window > 0, "Window must be positive"
+        self.window = window
+        self.threshold = threshold
+        self.interval = interval
+        self.fields = list(fields)
+
+    def should_stop(self, history: Sequence[KResult]) -> Optional[str]:
+        """
+        Decide whether to stop a run, given the snapshots seen of it so far.
+
+        Args:
+            history (Sequence[KResult]): Snapshots of the run, oldest first.
+
+        Returns:
+            Optional[str]: Why the run should stop, or None to let it continue.
+        """
+        if not history:
+            return None
+
+        latest = history[-1]
+        start = float(latest.get(KResultField.TIME)) - self.window
+
+        # The latest snapshot from at least a window ago, if the run is that old.
+        before = [r for r in history if float(r.get(KResultField.TIME)) <= start]
+        if not before:
+            return None
+
+        for field in self.fields:
+            gain = float(latest.get(field)) - float(before[-1].get(field))
+            if gain > self.threshold:
+                return None
+
+        watched = " and ".join(field.value for field in self.fields)
+        return (
+            f"Coverage plateau: {watched} improved by at most {self.threshold}"
+            f" in {self.window:g}s"
+        )
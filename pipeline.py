@@ -0,0 +1,107 @@
+"""Dependency-aware scheduling of KLEE runs derived from other runs' results."""
+
+from campaign import KleeCampaign
+from kresult import KResult
+from runklee import KleeRunOptions
+
+import threading
+
+from concurrent.futures import Future
+from typing import Callable, Sequence, Union
+
+Derivation = Callable[..., KleeRunOptions]
+
+
+class KleePipeline:
+    """
+    A DAG of KLEE runs, executed on a campaign as soon as dependencies allow.
+
+    A node either has fixed options, or derives its options from the results of
+    the nodes it depends on. Nodes are submitted to the campaign the moment their
+    last dependency finishes, so independent nodes (across programs, say) run
+    concurrently and a campaign takes as many waves as its longest chain. The
+    campaign must not be shut down before every node's future has resolved, as
+    dependent nodes are only submitted once their dependencies finish.
+
+    Attributes:
+        campaign (KleeCampaign): The campaign that nodes are run on.
+    """
+
+    def __init__(self, campaign: KleeCampaign):
+        """
+        Initialize the KleePipeline.
+
+        Args:
+            campaign (KleeCampaign): The campaign to run nodes on.
+        """
+        self.campaign = campaign
+        self._lock = threading.Lock()
+
+    def add(self, options: KleeRunOptions) -> "Future[KResult]":
+        """
+        Add a run without dependencies, which is scheduled immediately.
+
+        Args:
+            options (KleeRunOptions): Configuration options for the KLEE run.
+
+        Returns:
+            Future[KResult]: A future resolving to the results of the run.
+        """
+        return self.campaign.submit(options)
+
+    def then(
+        self,
+        after: Union["Future[KResult]", Sequence["Future[KResult]"]],
+        derive: Derivation,
+    ) -> "Future[KResult]":
+        """
+        Add a run whose options are derived from the results of other runs.
+
+        Args:
+            after (Union[Future[KResult], Sequence[Future[KResult]]]): The runs
+                this run depends on.
+            derive (Derivation): Called with the results of the runs in `after`,
+                in order, to produce this run's options.
+
+        Returns:
+            Future[KResult]: A future resolving to the results of the run. If a
+            dependency or the derivation fails, it resolves to that exception,
+            and if a dependency or the run is cancelled, it is cancelled too.
+        """
+        deps = [after] if isinstance(after, Future) else list(after)
+        node: "Future[KResult]" = Future()
+        remaining = [len(deps)]
+
+        def chain(run: "Future[KResult]") -> None:
+            if run.cancelled():
+                node.cancel()
+            elif run.exception() is not None:
+                node.set_exception(run.exception())
+            else:
+                node.set_result(run.result())
+
+        def schedule() -> None:
+            if any(dep.cancelled() for dep in deps):
+                node.cancel()
+                return
+            try:
+                options = derive(*(dep.result() for dep in deps))
+                self.campaign.submit(options).add_done_callback(chain)
+            except BaseException as e:
+                node.set_exception(e)
+
+        def on_dep_done(_: "Future[KResult]") -> None:
+            # Callbacks of different dependencies may race, so count under a lock.
+            with self._lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+            schedule()
+
+        for dep in deps:
+            dep.add_done_callback(on_dep_done)
+
+        if not deps:
+            schedule()
+
+        return node
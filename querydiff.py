@@ -0,0 +1,259 @@
+"""Streaming, bounded-memory diffs of the query logs of two KLEE runs."""
+
+from querylog import iter_queries, open_log, query_commands
+from queryindex import query_hash
+
+import re
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+DECLARED = re.compile(rb"\(declare-fun (\|[^|]*\||[^\s()]+) ")
+SYMBOL = re.compile(rb"\|[^|]*\||[^\s()|]+")
+QUERY_TYPE = re.compile(rb"; Query \d+ -- Type: (\w+)")
+
+
+def canonical_query(query: bytes) -> bytes:
+    """
+    Canonicalize a query, so that it equals the same query from another run.
+
+    Whitespace is normalised as by `query_commands`, KLEE's comment lines (query
+    numbers, instruction counts, timings) are dropped, and arrays are renamed in
+    order of declaration, as their names can differ between runs, e.g. by the
+    numeric suffixes KLEE gives to repeated allocation names.
+
+    Args:
+        query (bytes): The query.
+
+    Returns:
+        bytes: The canonical query.
+    """
+    text = b"\n".join(query_commands(query))
+    names = {name: b"a%d" % i for i, name in enumerate(DECLARED.findall(text))}
+    if not names:
+        return text
+    return SYMBOL.sub(lambda m: names.get(m.group(0), m.group(0)), text)
+
+
+class _Side:
+    """One log being diffed, with a bounded buffer of queries read ahead."""
+
+    def __init__(self, log_path: str):
+        self._log = open_log(log_path)
+        self._queries = iter_queries(self._log)
+        self._ahead: Deque[Tuple[int, str]] = deque()  # (hash, query type)
+        self.position = 0  # Position of the first query not yet consumed.
+
+    def peek(self, n: int) -> Optional[Tuple[int, str]]:
+        """The query `n` after the current one, or None past the end."""
+        while len(self._ahead) <= n:
+            query = next(self._queries, None)
+            if query is None:
+                return None
+            found = QUERY_TYPE.search(query)
+            kind = found.group(1).decode() if found else ""
+            self._ahead.append((query_hash(canonical_query(query)), kind))
+        return self._ahead[n]
+
+    def take(self, n: Optional[int], counts: Dict[str, int]) -> int:
+        """Consume `n` queries, or all that are left, counting them by type."""
+        taken = 0
+        while (n is None or taken < n) and self.peek(0) is not None:
+            _, kind = self._ahead.popleft()
+            counts[kind] = counts.get(kind, 0) + 1
+            taken += 1
+        self.position += taken
+        return taken
+
+    def close(self) -> None:
+        self._log.close()
+
+
+def _same(a: _Side, b: _Side) -> bool:
+    """Whether the current queries of both logs exist and match."""
+    x, y = a.peek(0), b.peek(0)
+    return x is not None and y is not None and x[0] == y[0]
+
+
+@dataclass
+class Region:
+    """A stretch of both logs, where their queries either match or do not."""
+
+    aligned: bool
+    start_a: int  # Position of the region's first query in each log.
+    start_b: int
+    count_a: int = 0  # Number of queries in the region in each log.
+    count_b: int = 0
+    types_a: Dict[str, int] = field(default_factory=dict)  # Counts by query type.
+    types_b: Dict[str, int] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        """
+        Summarise the region in one line.
+
+        Returns:
+            str: A human-readable summary.
+        """
+        if self.aligned:
+            return (
+                f"aligned   A[{self.start_a}:{self.start_a + self.count_a}]"
+                f" = B[{self.start_b}:{self.start_b + self.count_b}]"
+            )
+
+        def types(counts: Dict[str, int]) -> str:
+            return ", ".join(f"{kind or '?'} {n}" for kind, n in sorted(counts.items()))
+
+        return (
+            f"unaligned A[{self.start_a}:{self.start_a + self.count_a}]"
+            f" ({types(self.types_a) or 'none'})"
+            f" / B[{self.start_b}:{self.start_b + self.count_b}]"
+            f" ({types(self.types_b) or 'none'})"
+        )
+
+
+def _resync(a: _Side, b: _Side, window: int, sync: int) -> Tuple[int, int]:
+    """
+    Find how many queries to skip in each log for them to match again.
+
+    Takes the match that skips the fewest queries in total, where a match is
+    `sync` equal queries in a row (or fewer, up to the end of both logs).
+    Returns (window, window) if there is none within `window` queries.
+    """
+
+    def matches(i: int, j: int) -> bool:
+        for t in range(sync):
+            x, y = a.peek(i + t), b.peek(j + t)
+            if x is None or y is None:
+                return x is None and y is None
+            if x[0] != y[0]:
+                return False
+        return True
+
+    positions: Dict[int, List[int]] = {}
+    for j in range(window):
+        query = b.peek(j)
+        if query is None:
+            break
+        positions.setdefault(query[0], []).append(j)
+
+    best: Optional[Tuple[int, int]] = None
+    for i in range(window):
+        if best is not None and i >= sum(best):
+            break
+        query = a.peek(i)
+        if query is None:
+            break
+        for j in positions.get(query[0], ()):
+            if best is not None and i + j >= sum(best):
+                break
+            if matches(i, j):
+                best = (i, j)
+                break
+    return best if best is not None else (window, window)
+
+
+def iter_regions(
+    log_a: str, log_b: str, window: int = 1000, sync: int = 3
+) -> Iterator[Region]:
+    """
+    Diff two query logs, streaming both and holding at most about `window`
+    queries of each in memory, as hashes of their canonical forms.
+
+    Runs of matching queries form aligned regions. Where the logs diverge, the
+    differing queries up to where the logs match again form an unaligned region;
+    if they do not match again within `window` queries, the region keeps growing
+    by `window` queries of each log until they do, or until either log ends.
+
+    Args:
+        log_a (str): Path to the first query log, possibly compressed.
+        log_b (str): Path to the second query log, possibly compressed.
+        window (int): Number of queries of each log to search for a match in.
+        sync (int): Number of equal queries in a row that count as a match.
+
+    Yields:
+        Region: Each region, in order, alternating between aligned and not.
+    """
+    assert window > 0 and sync > 0
+    a, b = _Side(log_a), _Side(log_b)
+    try:
+        while a.peek(0) is not None or b.peek(0) is not None:
+            region = Region(True, a.position, b.position)
+            while _same(a, b):
+                region.count_a += a.take(1, region.types_a)
+                region.count_b += b.take(1, region.types_b)
+            if region.count_a:
+                yield region
+
+            region = Region(False, a.position, b.position)
+            while a.peek(0) is not None and b.peek(0) is not None and not _same(a, b):
+                i, j = _resync(a, b, window, sync)
+                region.count_a += a.take(i, region.types_a)
+                region.count_b += b.take(j, region.types_b)
+            if a.peek(0) is None or b.peek(0) is None:  # The rest is unmatched.
+                region.count_a += a.take(None, region.types_a)
+                region.count_b += b.take(None, region.types_b)
+            if region.count_a or region.count_b:
+                yield region
+    finally:
+        a.close()
+        b.close()
+
+
+@dataclass
+class LogDiff:
+    """How two query logs differ."""
+
+    regions: List[Region]
+
+    @property
+    def first_divergence(self) -> Optional[Tuple[int, int]]:
+        """Positions in each log of the first queries that differ, if any."""
+        for region in self.regions:
+            if not region.aligned:
+                return region.start_a, region.start_b
+        return None
+
+    def describe(self) -> str:
+        """
+        Summarise the diff, one line per region.
+
+        Returns:
+            str: A human-readable summary.
+        """
+        count_a = sum(region.count_a for region in self.regions)
+        count_b = sum(region.count_b for region in self.regions)
+        matched = sum(region.count_a for region in self.regions if region.aligned)
+        lines = [f"{count_a} vs {count_b} queries, {matched} aligned"]
+        if self.first_divergence is None:
+            lines.append("The logs match")
+        else:
+            lines.append("First divergence at A[%d] / B[%d]" % self.first_divergence)
+        lines += [region.describe() for region in self.regions]
+        return "\n".join(lines)
+
+
+def diff_logs(log_a: str, log_b: str, window: int = 1000, sync: int = 3) -> LogDiff:
+    """
+    Diff two query logs, see `iter_regions`.
+
+    Args:
+        log_a (str): Path to the first query log, possibly compressed.
+        log_b (str): Path to the second query log, possibly compressed.
+        window (int): Number of queries of each log to search for a match in.
+        sync (int): Number of equal queries in a row that count as a match.
+
+    Returns:
+        LogDiff: The diff.
+    """
+    return LogDiff(list(iter_regions(log_a, log_b, window, sync)))
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) in (3, 4):
+        print(diff_logs(*sys.argv[1:3], *[int(w) for w in sys.argv[3:]]).describe())
+    else:
+        print("Usage: python querydiff.py <query_log_a> <query_log_b> [window]")
+        sys.exit(1)
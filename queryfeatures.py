@@ -0,0 +1,233 @@
+"""Per-query features of SMT-LIB query logs, as columnar NumPy tables."""
+
+from querylog import (
+    HEADER,
+    SExpr,
+    fold_sexpr,
+    iter_queries,
+    open_log,
+    parse_sexprs,
+    query_outcome,
+    split_query,
+)
+
+import re
+
+import numpy as np
+
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Columns of a feature table, with their NumPy types.
+FEATURES: Dict[str, str] = {
+    "position": "i8",  # Position of the query in the log, from 0.
+    "type": "U16",  # KLEE's query type, e.g. "Validity" or "InitialValues".
+    "instructions": "i8",  # Instructions executed when the query was issued.
+    "bytes": "i8",  # Size of the query in the log.
+    "asserts": "i4",  # Constraints, including the query expression.
+    "arrays": "i4",  # Number of declared arrays.
+    "max_array_size": "i8",  # Sizes are inferred, see `query_features`.
+    "total_array_size": "i8",
+    "nodes": "i8",  # Expression nodes across all assertions.
+    "depth": "i4",  # Deepest nesting of applications in a constraint.
+    "min_bv_width": "i4",
+    "max_bv_width": "i4",
+    "bv_widths": "i4",  # Number of distinct bit-vector widths.
+    "result": "i1",  # 1 if satisfiable, 0 if unsatisfiable, -1 if unknown.
+    "elapsed": "f8",  # Solver time recorded by KLEE, in seconds.
+}
+
+# Rows extracted into each block of a feature table before it is set aside.
+CHUNK_ROWS = 1 << 16
+
+WIDTH = re.compile(rb"\(_ (?:BitVec|bv\d+) (\d+) ?\)")
+SELECT = re.compile(rb"\(select\s+(\|[^|]*\||[^\s()]+)\s+\(_ bv(\d+) \d+ ?\)")
+
+
+Shape = Tuple[int, int, Tuple[Tuple[int, int], ...]]  # Nodes, depth, conjuncts.
+
+
+def _shape_leaf(atom: bytes) -> Shape:
+    return 1, 0, ()  # An atom is one node, at no depth.
+
+
+def _shape_apply(node: List[SExpr], shapes: List[Shape]) -> Shape:
+    if not node or node[0] == b"_":
+        return 1, 0, ()  # An indexed constant, e.g. (_ bv5 8), is a leaf.
+
+    # The operator, even a compound one like (_ extract 7 0), is one node.
+    args = shapes[1:]
+    nodes = 1 + sum(n for n, _, _ in args)
+    depth = 1 + max((d for _, d, _ in args), default=0)
+    conjuncts: Tuple[Tuple[int, int], ...] = ()
+    if node[0] == b"and":
+        conjuncts = tuple(c for n, d, cs in args for c in (cs or ((n, d),)))
+    return nodes, depth, conjuncts
+
+
+def _expression_shape(text: bytes) -> Dict[str, int]:
+    """
+    Count the constraints, expression nodes and nesting depth of a query.
+
+    KLEE prints a query either as one assertion per constraint, or by default as
+    a single assertion joining every constraint with `and`, abbreviated by `let`.
+    Operands of top-level `and`s count as constraints of their own, and names
+    bound by `let` as the expressions they abbreviate, so that a query has the
+    same shape however it was printed.
+    """
+    asserts = nodes = depth = 0
+    for command in parse_sexprs(text):
+        if isinstance(command, list) and len(command) == 2:
+            if command[0] == b"assert":
+                n, d, conjuncts = fold_sexpr(command[1], _shape_leaf, _shape_apply)
+                for n, d in conjuncts or ((n, d),):
+                    asserts, nodes, depth = asserts + 1, nodes + n, max(depth, d)
+    return {"asserts": asserts, "nodes": nodes, "depth": depth}
+
+
+def query_features(query: bytes) -> Dict[str, object]:
+    """
+    Extract the features of one query.
+
+    KLEE declares every array with 32-bit indices rather than its size, so array
+    sizes are inferred as one past the largest constant index read from each.
+
+    Args:
+        query (bytes): The query, as split from a log by `iter_queries`.
+
+    Returns:
+        Dict[str, object]: A value for every column in FEATURES but "position".
+    """
+    text, notes = split_query(query)
+
+    features: Dict[str, object] = {"type": "", "instructions": -1}
+    header = HEADER.search(notes)
+    if header is not None:
+        features["type"] = header.group(1).decode()
+        features["instructions"] = int(header.group(2))
+    features["bytes"] = len(query)
+
+    features.update(_expression_shape(text))
+    features["arrays"] = text.count(b"(declare-fun ")
+
+    sizes: Dict[bytes, int] = {}
+    for array, index in SELECT.findall(text):
+        sizes[array] = max(sizes.get(array, 0), int(index) + 1)
+    features["max_array_size"] = max(sizes.values(), default=0)
+    features["total_array_size"] = sum(sizes.values())
+
+    widths = {int(width) for width in WIDTH.findall(text)}
+    features["min_bv_width"] = min(widths, default=0)
+    features["max_bv_width"] = max(widths, default=0)
+    features["bv_widths"] = len(widths)
+
+    features["result"], features["elapsed"] = query_outcome(query)
+    return features
+
+
+def iter_features(log_path: str) -> Iterator[Dict[str, object]]:
+    """
+    Stream the features of every query in a log, one query in memory at a time.
+
+    Args:
+        log_path (str): Path to the query log, possibly compressed.
+
+    Yields:
+        Dict[str, object]: The features of each query, in log order.
+    """
+    with open_log(log_path) as log:
+        for position, query in enumerate(iter_queries(log)):
+            features = query_features(query)
+            features["position"] = position
+            yield features
+
+
+def _empty_columns(rows: int) -> Dict[str, np.ndarray]:
+    return {name: np.empty(rows, dtype=dtype) for name, dtype in FEATURES.items()}
+
+
+def feature_table(log_path: str, chunk_rows: int = CHUNK_ROWS) -> Dict[str, np.ndarray]:
+    """
+    Extract the features of every query in a log into columns.
+
+    Features are written straight into preallocated blocks of `chunk_rows` rows,
+    so memory holds only the compact table, never Python objects per query.
+
+    Args:
+        log_path (str): Path to the query log, possibly compressed.
+        chunk_rows (int): Rows per block.
+
+    Returns:
+        Dict[str, np.ndarray]: One array per column in FEATURES.
+    """
+    chunks: Dict[str, List[np.ndarray]] = {name: [] for name in FEATURES}
+    chunk, filled = _empty_columns(chunk_rows), 0
+
+    for features in iter_features(log_path):
+        for name, column in chunk.items():
+            column[filled] = features[name]
+        filled += 1
+        if filled == chunk_rows:
+            for name, column in chunk.items():
+                chunks[name].append(column)
+            chunk, filled = _empty_columns(chunk_rows), 0
+
+    for name, column in chunk.items():
+        chunks[name].append(column[:filled])
+    return {name: np.concatenate(columns) for name, columns in chunks.items()}
+
+
+def save_features(log_path: str, path: str, program: str, run: str) -> int:
+    """
+    Extract the features of a log into an .npz table keyed by program and run.
+
+    Args:
+        log_path (str): Path to the query log, possibly compressed.
+        path (str): Path to write the table to.
+        program (str): Name of the program under test.
+        run (str): Name of the run, e.g. its configuration.
+
+    Returns:
+        int: Number of queries in the table.
+    """
+    table = feature_table(log_path)
+    np.savez_compressed(path, program=np.array(program), run=np.array(run), **table)
+    return len(table["position"])
+
+
+def load_features(paths: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Load and concatenate feature tables, e.g. of several programs and runs.
+
+    Args:
+        paths (Sequence[str]): Paths to tables written by `save_features`.
+
+    Returns:
+        Dict[str, np.ndarray]: Every column in FEATURES, plus "program" and "run"
+        columns telling which table each query came from. Without any tables,
+        every column is empty.
+    """
+    if not paths:
+        table = _empty_columns(0)
+        table["program"], table["run"] = np.array([], str), np.array([], str)
+        return table
+
+    tables = []
+    for path in paths:
+        with np.load(path) as data:
+            table = {name: data[name] for name in FEATURES}
+            rows = len(table["position"])
+            table["program"] = np.full(rows, data["program"].item())
+            table["run"] = np.full(rows, data["run"].item())
+            tables.append(table)
+    return {name: np.concatenate([t[name] for t in tables]) for name in tables[0]}
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) == 5:
+        count = save_features(*sys.argv[1:])
+        print(f"Extracted features of {count} queries")
+    else:
+        print("Usage: python queryfeatures.py <query_log> <out.npz> <program> <run>")
+        sys.exit(1)
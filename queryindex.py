@@ -0,0 +1,263 @@
+"""Random access to uncompressed query logs through a byte-offset index."""
+
+from querylog import QUERY_MARKER
+
+import hashlib
+import json
+import mmap
+import os
+
+import numpy as np
+
+from typing import List, Optional, Sequence, Union
+
+# One entry per query: where it starts, how long it is, and a hash of it.
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4"), ("hash", "<u8")])
+
+
+def index_path(log_path: str) -> str:
+    """
+    Get the path to the side file holding the index of a query log.
+
+    Args:
+        log_path (str): Path to the uncompressed query log.
+
+    Returns:
+        str: Path to its index.
+    """
+    return f"{log_path}.qidx.npy"
+
+
+def log_stamp(log_path: str) -> List[int]:
+    """
+    Identify a version of a query log, so that an index of another is not used.
+
+    Args:
+        log_path (str): Path to the uncompressed query log.
+
+    Returns:
+        List[int]: The log's size, modification time in nanoseconds and inode,
+        which change whenever it is rewritten, even to the same size.
+    """
+    st = os.stat(log_path)
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def stamp_path(log_path: str) -> str:
+    """
+    Get the path to the side file recording which version of a log is indexed.
+
+    Args:
+        log_path (str): Path to the uncompressed query log.
+
+    Returns:
+        str: Path to the index's stamp.
+    """
+    return f"{log_path}.qidx.json"
+
+
+def query_hash(query: Union[bytes, memoryview]) -> int:
+    """
+    Hash the exact bytes of a query, as recorded in the index.
+
+    Args:
+        query (Union[bytes, memoryview]): The query.
+
+    Returns:
+        int: A 64-bit hash.
+    """
+    return int.from_bytes(hashlib.blake2b(query, digest_size=8).digest(), "little")
+
+
+class QueryIndex:
+    """
+    A query log, memory-mapped, with the offset, length and hash of each query.
+
+    The index is built in one pass over the mapped log, which only ever touches
+    the log through the page cache, and is saved as a NumPy array beside it,
+    along with a stamp of the log's size, modification time and inode.
+    Later opens memory-map that array too, so fetching query N, a slice of
+    queries or a random sample costs the same however large the log is, and
+    queries are only copied into Python bytes when fetched.
+
+    Attributes:
+        log_path (str): Path to the uncompressed query log.
+        entries (np.ndarray): One INDEX_DTYPE record per query, in log order.
+    """
+
+    def __init__(self, log_path: str, entries: np.ndarray):
+        """
+        Initialize a QueryIndex. Use `open` or `build` rather than this.
+
+        Args:
+            log_path (str): Path to the uncompressed query log.
+            entries (np.ndarray): The index of the log.
+        """
+        self.log_path = log_path
+        self.entries = entries
+
+        self._file = open(log_path, "rb")
+        self._map: Optional[mmap.mmap] = None
+        if len(entries):  # Empty files cannot be mapped.
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def build(cls, log_path: str) -> "QueryIndex":
+        """
+        Index a query log in one pass, saving the index beside it.
+
+        Anything before the first query marker is left out of the index.
+
+        Args:
+            log_path (str): Path to the uncompressed query log.
+
+        Returns:
+            QueryIndex: The indexed log.
+        """
+        offsets: List[int] = []
+        hashes: List[int] = []
+
+        # Stamped before reading, so a log changed while indexing is reindexed.
+        stamp = log_stamp(log_path)
+        size = stamp[0]
+        if size:
+            with open(log_path, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as m:
+                marker = b"\n" + QUERY_MARKER
+                start = 0 if m[: len(QUERY_MARKER)] == QUERY_MARKER else m.find(marker)
+                if start > 0:
+                    start += 1  # Skip the newline ending the previous line.
+
+                view = memoryview(m)
+                while start >= 0:
+                    end = m.find(marker, start)
+                    end = size if end < 0 else end + 1
+                    offsets.append(start)
+                    hashes.append(query_hash(view[start:end]))
+                    start = end if end < size else -1
+                view.release()
+
+        entries = np.zeros(len(offsets), dtype=INDEX_DTYPE)
+        entries["offset"] = offsets
+        entries["length"] = np.diff(offsets + [size]) if offsets else []
+        entries["hash"] = hashes
+        np.save(index_path(log_path), entries)
+        with open(stamp_path(log_path), "w") as f:
+            json.dump(stamp, f)
+
+        return cls(log_path, entries)
+
+    @classmethod
+    def open(cls, log_path: str) -> "QueryIndex":
+        """
+        Open an indexed query log, building the index if it is missing or stale.
+
+        Args:
+            log_path (str): Path to the uncompressed query log.
+
+        Returns:
+            QueryIndex: The indexed log.
+        """
+        try:
+            with open(stamp_path(log_path), "r") as f:
+                stamp = json.load(f)
+            entries = np.load(index_path(log_path), mmap_mode="r")
+        except (OSError, ValueError):
+            return cls.build(log_path)
+
+        # An index is stale if the log was rewritten, or appended to, since.
+        if stamp != log_stamp(log_path):
+            return cls.build(log_path)
+        return cls(log_path, entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def query(self, n: int) -> bytes:
+        """
+        Fetch one query.
+
+        Args:
+            n (int): Position of the query in the log, from 0; negative values
+                count from the end.
+
+        Returns:
+            bytes: The query.
+
+        Raises:
+            IndexError: If the log has fewer queries.
+        """
+        entry = self.entries[n]
+        offset, length = int(entry["offset"]), int(entry["length"])
+        return self._map[offset : offset + length]
+
+    def slice(self, start: int, stop: int) -> bytes:
+        """
+        Fetch a contiguous range of queries in one read.
+
+        Args:
+            start (int): Position of the first query.
+            stop (int): Position one past the last query.
+
+        Returns:
+            bytes: The queries, concatenated as they appear in the log.
+        """
+        entries = self.entries[start:stop]
+        if not len(entries):
+            return b""
+        begin = int(entries["offset"][0])
+        end = int(entries["offset"][-1] + entries["length"][-1])
+        return self._map[begin:end]
+
+    def sample(self, k: int, seed: Optional[int] = None) -> List[int]:
+        """
+        Choose a uniform random sample of queries, without replacement.
+
+        Args:
+            k (int): Number of queries to choose, at most the number of queries.
+            seed (Optional[int]): Seed, for reproducible samples.
+
+        Returns:
+            List[int]: Positions of the chosen queries, in log order.
+        """
+        rng = np.random.default_rng(seed)
+        return sorted(rng.choice(len(self), size=k, replace=False).tolist())
+
+    def fetch(self, positions: Sequence[int]) -> List[bytes]:
+        """
+        Fetch several queries, e.g. a sample.
+
+        Args:
+            positions (Sequence[int]): Positions of the queries.
+
+        Returns:
+            List[bytes]: The queries, in the order given.
+        """
+        return [self.query(n) for n in positions]
+
+    def close(self) -> None:
+        """Unmap and close the log."""
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "QueryIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) in (2, 3):
+        with QueryIndex.open(sys.argv[1]) as index:
+            if len(sys.argv) == 2:
+                print(f"{len(index)} queries")
+            else:
+                sys.stdout.buffer.write(index.query(int(sys.argv[2])))
+    else:
+        print("Usage: python queryindex.py <query_log> [query_number]")
+        sys.exit(1)
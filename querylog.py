@@ -0,0 +1,451 @@
+"""Read and compress the SMT-LIB query logs that KLEE writes with `logFile`."""
+
+import bisect
+import gzip
+import io
+import json
+import re
+import threading
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from typing import (
+    BinaryIO,
+    Callable,
+    Deque,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+# Every query in a log starts with a comment line like
+# "; Query 42 -- Type: Validity, Instructions: 1234".
+QUERY_MARKER = b"; Query "
+
+# Every query starts with a header naming its type, which is one of "Truth",
+# "Validity", "Value" or "InitialValues", and when in the run it was issued.
+HEADER = re.compile(rb"; Query \d+ -- Type: (\w+), Instructions: (\d+)")
+
+# Tokens of SMT-LIB text: parentheses, |quoted| symbols and other atoms.
+TOKEN = re.compile(rb"\(|\)|\|[^|]*\||[^\s()|]+")
+
+# Notes KLEE appends to a query: its solver time, and its outcome, which is
+# noted differently for each query type (Truth, Validity, Value, InitialValues).
+ELAPSED = re.compile(rb"Elapsed: ([0-9.eE+-]+)")
+VERDICT = re.compile(rb"(Is Valid|Validity|Result|Solvable): (\S+)")
+
+
+class Codec(Enum):
+    """Compression formats for query logs, named after their file suffixes."""
+
+    GZIP = "gz"
+    ZSTD = "zst"
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd query logs need the `zstandard` package") from None
+    return zstandard
+
+
+def open_log(path: str) -> BinaryIO:
+    """
+    Open a query log for streaming, decompressing it if its suffix says so.
+
+    Args:
+        path (str): Path to the query log, possibly ending in ".gz" or ".zst".
+
+    Returns:
+        BinaryIO: The uncompressed contents of the log.
+    """
+    if path.endswith(f".{Codec.GZIP.value}"):
+        return gzip.open(path, "rb")
+    if path.endswith(f".{Codec.ZSTD.value}"):
+        reader = (
+            _zstandard()
+            .ZstdDecompressor()
+            .stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+        )
+        return io.BufferedReader(reader)
+    return open(path, "rb")
+
+
+def iter_queries(log: BinaryIO) -> Iterator[bytes]:
+    """
+    Split an uncompressed query log into queries, reading it line by line.
+
+    Args:
+        log (BinaryIO): The query log.
+
+    Yields:
+        bytes: Each query, from its marker line up to the next query's, in order.
+        Anything before the first marker is yielded with the first query.
+    """
+    query: List[bytes] = []
+    started = False  # Whether `query` holds a marker yet.
+    for line in log:
+        if line.startswith(QUERY_MARKER):
+            if started:
+                yield b"".join(query)
+                query = []
+            started = True
+        query.append(line)
+    if query:
+        yield b"".join(query)
+
+
+def split_query(query: bytes) -> Tuple[bytes, bytes]:
+    """
+    Split a query into its SMT-LIB commands and KLEE's comment lines.
+
+    Args:
+        query (bytes): The query.
+
+    Returns:
+        Tuple[bytes, bytes]: The commands, and the comments, each as lines.
+    """
+    comments, commands = [], []
+    for line in query.splitlines():
+        (comments if line.startswith(b";") else commands).append(line)
+    return b"\n".join(commands), b"\n".join(comments)
+
+
+def query_commands(query: bytes) -> List[bytes]:
+    """
+    Get the top-level SMT-LIB commands of a query, with whitespace normalised.
+
+    Args:
+        query (bytes): The query.
+
+    Returns:
+        List[bytes]: Each command, e.g. b"(assert (bvult x y))", in order.
+    """
+    text, _ = split_query(query)
+    text = re.sub(rb"\s+", b" ", text)
+    text = text.replace(b"( ", b"(").replace(b" )", b")")
+
+    commands, depth, start = [], 0, 0
+    for i, c in enumerate(text):
+        if c == 0x28:  # "("
+            if depth == 0:
+                start = i
+            depth += 1
+        elif c == 0x29:  # ")"
+            depth -= 1
+            if depth == 0:
+                commands.append(text[start : i + 1])
+    return commands
+
+
+SExpr = Union[bytes, List["SExpr"]]
+T = TypeVar("T")
+
+
+def parse_sexprs(text: bytes) -> List[SExpr]:
+    """
+    Parse SMT-LIB text into nested lists of atoms, without recursing.
+
+    Args:
+        text (bytes): The text, e.g. the commands of a query from `split_query`.
+
+    Returns:
+        List[SExpr]: Each top-level expression. Unbalanced parentheses at the
+        end, as left by a truncated log, are ignored.
+    """
+    stack: List[List[SExpr]] = [[]]
+    for token in TOKEN.findall(text):
+        if token == b"(":
+            stack.append([])
+        elif token == b")":
+            if len(stack) > 1:
+                done = stack.pop()
+                stack[-1].append(done)
+        else:
+            stack[-1].append(token)
+    return stack[0]
+
+
+_APPLY, _BIND = object(), object()
+
+
+def fold_sexpr(
+    expr: SExpr,
+    leaf: Callable[[bytes], T],
+    apply: Callable[[List[SExpr], List[T]], T],
+) -> T:
+    """
+    Fold an expression bottom up, seeing through `let` abbreviations.
+
+    KLEE abbreviates shared subexpressions with `let` by default, as in
+    `(let ((?B1 (select a (_ bv0 32)))) (= ?B1 ?B1))`. A name bound this way
+    folds to what its bound expression folds to, and a `let` to what its body
+    folds to, so an expression folds the same whether abbreviated or not.
+
+    Args:
+        expr (SExpr): The expression, as from `parse_sexprs`.
+        leaf (Callable[[bytes], T]): Folds an atom other than a bound name.
+        apply (Callable[[List[SExpr], List[T]], T]): Folds a list, given it and
+            the folds of its elements, in order.
+
+    Returns:
+        T: The fold of the expression.
+    """
+    values: List[T] = []
+    work: List[Tuple] = [(expr, {})]
+    while work:
+        item = work.pop()
+        if item[0] is _APPLY:
+            _, node, n = item
+            args = values[len(values) - n :]
+            del values[len(values) - n :]
+            values.append(apply(node, args))
+        elif item[0] is _BIND:
+            _, names, body, env = item
+            bound = values[len(values) - len(names) :]
+            del values[len(values) - len(names) :]
+            work.append((body, {**env, **dict(zip(names, bound))}))
+        else:
+            node, env = item
+            if isinstance(node, bytes):
+                values.append(env[node] if node in env else leaf(node))
+            elif len(node) == 3 and node[0] == b"let" and isinstance(node[1], list):
+                # Bound expressions are folded in the outer scope, as in SMT-LIB.
+                bindings = [b for b in node[1] if isinstance(b, list) and len(b) == 2]
+                work.append((_BIND, [b[0] for b in bindings], node[2], env))
+                work.extend((b[1], env) for b in reversed(bindings))
+            else:
+                work.append((_APPLY, node, len(node)))
+                work.extend((e, env) for e in reversed(node))
+    return values[0]
+
+
+def query_outcome(query: bytes) -> Tuple[int, float]:
+    """
+    Get the outcome of a query, and its solver time, from KLEE's notes on it.
+
+    Args:
+        query (bytes): The query.
+
+    Returns:
+        Tuple[int, float]: 1 if the asserted formula is satisfiable, 0 if it is
+        unsatisfiable and -1 if unknown; and the solver time in seconds, or NaN.
+    """
+    _, notes = split_query(query)
+
+    # A valid query is one whose negation, which is what was checked, is unsat.
+    verdict = VERDICT.search(notes)
+    if verdict is None or b"FAIL" in notes:
+        result = -1
+    elif verdict.group(1) == b"Is Valid":
+        result = int(verdict.group(2) == b"false")
+    elif verdict.group(1) == b"Validity":
+        # Validity is 1 if valid, else -1 (always false) or 0 (either way).
+        result = int(verdict.group(2) != b"1")
+    elif verdict.group(1) == b"Result":
+        result = 1  # A value was found, so the constraints are satisfiable.
+    else:
+        result = int(verdict.group(2) == b"true")
+
+    elapsed = ELAPSED.search(notes)
+    return result, float(elapsed.group(1)) if elapsed else float("nan")
+
+
+def _frames(log: BinaryIO, frame_size: int) -> Iterator[Tuple[bytes, int]]:
+    """Group whole queries into frames of about `frame_size` bytes."""
+    frame: List[bytes] = []
+    size = count = 0
+    for query in iter_queries(log):
+        frame.append(query)
+        size, count = size + len(query), count + 1
+        if size >= frame_size:
+            yield b"".join(frame), count
+            frame, size, count = [], 0, 0
+    if frame:
+        yield b"".join(frame), count
+
+
+class LogCompression:
+    """
+    Streaming, parallel compression of query logs into independent frames.
+
+    Logs are cut into frames of about `frame_size` bytes at query boundaries,
+    which a pool of `workers` threads compresses concurrently (both codecs release
+    the GIL) while at most a few frames per worker are held in memory. Frames are
+    written in order as concatenated gzip members or zstd frames, so the result
+    is an ordinary .gz or .zst file. With `seekable` set, a JSON index of the
+    frames is written next to it, so that a query can be read by decompressing
+    just its frame (see SeekableLog).
+
+    Attributes:
+        codec (Codec): The compression format.
+        level (int): The compression level, as understood by the codec.
+        workers (int): Number of frames compressed concurrently.
+        frame_size (int): Uncompressed bytes per frame, rounded up to a query.
+        seekable (bool): Whether to write a frame index.
+    """
+
+    def __init__(
+        self,
+        codec: Codec = Codec.GZIP,
+        level: int = 6,
+        workers: int = 4,
+        frame_size: int = 4 * 1024 * 1024,
+        seekable: bool = False,
+    ):
+        """
+        Initialize the LogCompression.
+
+        Args:
+            codec (Codec): The compression format.
+            level (int): The compression level, as understood by the codec.
+            workers (int): Number of frames compressed concurrently.
+            frame_size (int): Uncompressed bytes per frame.
+            seekable (bool): Whether to write a frame index for random access.
+        """
+        assert workers > 0 and frame_size > 0
+        self.codec = codec
+        self.level = level
+        self.workers = workers
+        self.frame_size = frame_size
+        self.seekable = seekable
+
+    def destination(self, path: str) -> str:
+        """
+        Get where a log destined for `path` is written, with the codec's suffix.
+
+        Args:
+            path (str): The requested destination.
+
+        Returns:
+            str: `path`, suffixed by the codec unless it already is.
+        """
+        suffix = f".{self.codec.value}"
+        return path if path.endswith(suffix) else path + suffix
+
+    def _compressor(self) -> Callable[[bytes], bytes]:
+        if self.codec == Codec.ZSTD:
+            zstandard = _zstandard()
+            local = threading.local()  # Compressors are not thread-safe.
+
+            def compress(data: bytes) -> bytes:
+                if not hasattr(local, "compressor"):
+                    local.compressor = zstandard.ZstdCompressor(level=self.level)
+                return local.compressor.compress(data)
+
+            return compress
+        return lambda data: gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compress(self, source: str, path: str) -> str:
+        """
+        Compress an uncompressed query log.
+
+        Args:
+            source (str): Path to the uncompressed log.
+            path (str): The requested destination, see `destination`.
+
+        Returns:
+            str: Path to the compressed log.
+        """
+        dest = self.destination(path)
+        compress = self._compressor()
+        index: List[Tuple[int, int, int]] = []  # (offset, size, first query)
+        offset = first = 0
+
+        pending: Deque[Tuple["Future[bytes]", int]] = deque()
+
+        def write_oldest(out: BinaryIO) -> None:
+            nonlocal offset, first
+            future, count = pending.popleft()
+            data = future.result()
+            out.write(data)
+            index.append((offset, len(data), first))
+            offset, first = offset + len(data), first + count
+
+        with open(source, "rb") as log, open(dest, "wb") as out:
+            with ThreadPoolExecutor(self.workers) as pool:
+                for frame, count in _frames(log, self.frame_size):
+                    pending.append((pool.submit(compress, frame), count))
+                    if len(pending) > 2 * self.workers:
+                        write_oldest(out)
+                while pending:
+                    write_oldest(out)
+
+        if self.seekable:
+            with open(f"{dest}.idx", "w") as f:
+                json.dump(
+                    {"codec": self.codec.value, "queries": first, "frames": index}, f
+                )
+
+        return dest
+
+
+class SeekableLog:
+    """
+    Random access to the queries of a log compressed with a frame index.
+
+    Attributes:
+        path (str): Path to the compressed log.
+        codec (Codec): Its compression format.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the SeekableLog.
+
+        Args:
+            path (str): Path to a log compressed by a seekable LogCompression.
+
+        Raises:
+            FileNotFoundError: If the log has no frame index.
+        """
+        self.path = path
+        with open(f"{path}.idx", "r") as f:
+            index = json.load(f)
+        self.codec = Codec(index["codec"])
+        self._frames: List[List[int]] = index["frames"]
+        self._firsts = [first for _, _, first in self._frames]
+        self._cached: Optional[Tuple[int, List[bytes]]] = None
+        self._queries: int = index["queries"]
+
+    def __len__(self) -> int:
+        return self._queries
+
+    def _decompress(self, data: bytes) -> bytes:
+        if self.codec == Codec.ZSTD:
+            return _zstandard().ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def _frame(self, number: int) -> List[bytes]:
+        if self._cached is None or self._cached[0] != number:
+            offset, size, _ = self._frames[number]
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                data = self._decompress(f.read(size))
+            self._cached = (number, list(iter_queries(io.BytesIO(data))))
+        return self._cached[1]
+
+    def query(self, n: int) -> bytes:
+        """
+        Read one query, decompressing only the frame holding it.
+
+        Args:
+            n (int): Position of the query in the log, from 0.
+
+        Returns:
+            bytes: The query.
+
+        Raises:
+            IndexError: If the log has fewer queries.
+        """
+        if not 0 <= n < len(self):
+            raise IndexError(f"No query {n}")
+
+        # The last frame whose first query is at or before `n`.
+        frame = bisect.bisect_right(self._firsts, n) - 1
+        return self._frame(frame)[n - self._firsts[frame]]
@@ -0,0 +1,135 @@
+"""Background deletion of KLEE output directories, off the critical path of runs."""
+
+import os
+import queue
+import threading
+import time
+import uuid
+
+from typing import List, Optional, Set
+
+TRASH_DIR = ".klee-trash"
+
+
+class OutputReaper:
+    """
+    Deletes directories in background threads, so the next run need not wait.
+
+    Directories are first renamed into a trash directory beside them, which is
+    atomic and instant as it stays on the same file system, so their original
+    paths are free to reuse immediately. Deletion then proceeds in at most
+    `workers` threads at the lowest CPU (and so IO) priority, pausing after every
+    `batch` entries to leave the disk to in-flight runs. Anything left in a trash
+    directory by a crash is deleted the next time that trash directory is used.
+
+    Attributes:
+        workers (int): Maximum number of directories deleted concurrently.
+        batch (int): Number of entries deleted between pauses.
+        pause (float): Seconds to pause after each batch.
+    """
+
+    def __init__(self, workers: int = 1, batch: int = 1000, pause: float = 0.05):
+        """
+        Initialize the OutputReaper, starting its worker threads.
+
+        Args:
+            workers (int): Maximum number of directories deleted concurrently.
+            batch (int): Number of entries deleted between pauses.
+            pause (float): Seconds to pause after each batch.
+        """
+        assert workers > 0, "There must be at least one worker"
+        self.workers = workers
+        self.batch = batch
+        self.pause = pause
+
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._trash_dirs: Set[str] = set()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = [
+            threading.Thread(target=self._work, name=f"klee-reaper-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _trash_dir(self, path: str) -> str:
+        """Get the trash directory beside `path`, queueing any crash leftovers."""
+        trash = os.path.join(os.path.dirname(os.path.abspath(path)), TRASH_DIR)
+        with self._lock:
+            if trash not in self._trash_dirs:
+                os.makedirs(trash, exist_ok=True)
+                for leftover in os.listdir(trash):
+                    self._queue.put(os.path.join(trash, leftover))
+                self._trash_dirs.add(trash)
+        return trash
+
+    def discard(self, path: str) -> None:
+        """
+        Move a directory out of the way and schedule it for deletion.
+
+        Args:
+            path (str): The directory to delete. Nothing happens if it is missing.
+        """
+        if not os.path.isdir(path):
+            return
+        name = f"{os.path.basename(os.path.normpath(path))}.{uuid.uuid4().hex}"
+        doomed = os.path.join(self._trash_dir(path), name)
+        os.rename(path, doomed)
+        self._queue.put(doomed)
+
+    def _delete(self, path: str) -> None:
+        """Delete a directory tree bottom-up, pausing between batches."""
+        deleted = 0
+        for dirpath, dirnames, filenames in os.walk(path, topdown=False):
+            for name in filenames:
+                os.unlink(os.path.join(dirpath, name))
+            for name in dirnames:
+                entry = os.path.join(dirpath, name)
+                if os.path.islink(entry):
+                    os.unlink(entry)  # Symlinks to directories are listed here too.
+                else:
+                    os.rmdir(entry)
+
+            deleted += len(filenames) + len(dirnames)
+            if deleted >= self.batch:
+                deleted = 0
+                time.sleep(self.pause)
+        os.rmdir(path)
+
+    def _work(self) -> None:
+        # Threads have their own nice value on Linux, which IO schedulers honour.
+        # 19 is the highest nice value, and so the lowest priority.
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        while True:
+            path = self._queue.get()
+            try:
+                if path is None:
+                    return
+                self._delete(path)
+            except OSError:
+                pass  # Left for the next time the trash directory is used.
+            finally:
+                self._queue.task_done()
+
+    def drain(self) -> None:
+        """Wait until every directory discarded so far has been deleted."""
+        self._queue.join()
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop the worker threads once they have deleted what was discarded.
+
+        Args:
+            wait (bool): Whether to wait for the pending deletions to finish.
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self) -> "OutputReaper":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
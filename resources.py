@@ -0,0 +1,438 @@
+"""Readers for host and process resource information from /proc and /sys."""
+
+import asyncio
+import os
+import resource
+import threading
+
+from contextlib import asynccontextmanager, contextmanager, suppress
+from typing import AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+PROC_DIR = "/proc"
+SYS_CPU_DIR = "/sys/devices/system/cpu"
+CGROUP_DIR = "/sys/fs/cgroup"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def meminfo() -> Dict[str, int]:
+    """
+    Read the host memory statistics.
+
+    Returns:
+        Dict[str, int]: Fields of /proc/meminfo, in KiB.
+    """
+    info = {}
+    with open(os.path.join(PROC_DIR, "meminfo"), "r") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            info[key] = int(value.split()[0])
+    return info
+
+
+def available_memory_mb() -> float:
+    """
+    Get the memory available for starting new applications without swapping.
+
+    Returns:
+        float: Available memory in MiB, as estimated by the kernel.
+    """
+    return meminfo()["MemAvailable"] / 1024
+
+
+def process_tree(pid: int) -> List[int]:
+    """
+    Get a process and all of its live descendants.
+
+    Args:
+        pid (int): Process ID of the root process.
+
+    Returns:
+        List[int]: Process IDs in the tree, root first. Empty if `pid` has exited.
+    """
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        task_dir = os.path.join(PROC_DIR, str(current), "task")
+        try:
+            tids = os.listdir(task_dir)
+        except OSError:
+            continue  # Exited in the meantime.
+
+        tree.append(current)
+        for tid in tids:
+            try:
+                with open(os.path.join(task_dir, tid, "children"), "r") as f:
+                    pending.extend(int(child) for child in f.read().split())
+            except OSError:
+                continue
+    return tree
+
+
+def process_status(pid: int) -> Dict[str, str]:
+    """
+    Read the status fields of a process.
+
+    Args:
+        pid (int): Process ID.
+
+    Returns:
+        Dict[str, str]: Fields of /proc/<pid>/status, or empty if it has exited.
+    """
+    try:
+        with open(os.path.join(PROC_DIR, str(pid), "status"), "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return {}
+    return {k: v.strip() for k, _, v in (line.partition(":") for line in lines)}
+
+
+def tree_rss_mb(pid: int) -> float:
+    """
+    Get the resident memory of a process and all of its descendants.
+
+    Args:
+        pid (int): Process ID of the root process.
+
+    Returns:
+        float: Total resident set size in MiB.
+    """
+    total_kb = 0
+    for member in process_tree(pid):
+        rss = process_status(member).get("VmRSS")
+        if rss is not None:
+            total_kb += int(rss.split()[0])
+    return total_kb / 1024
+
+
+def process_stat(pid: int) -> List[str]:
+    """
+    Read the stat fields of a process.
+
+    Args:
+        pid (int): Process ID.
+
+    Returns:
+        List[str]: Fields of /proc/<pid>/stat after the command name, so that the
+        state is at index 0 and field N of proc(5) at index N - 3. Empty if the
+        process has exited.
+    """
+    try:
+        with open(os.path.join(PROC_DIR, str(pid), "stat"), "r") as f:
+            stat = f.read()
+    except OSError:
+        return []
+    return stat[stat.rfind(")") + 2 :].split()  # The name may contain spaces.
+
+
+def process_io(pid: int) -> Dict[str, int]:
+    """
+    Read the IO counters of a process.
+
+    Args:
+        pid (int): Process ID.
+
+    Returns:
+        Dict[str, int]: Fields of /proc/<pid>/io, or empty if it has exited.
+    """
+    try:
+        with open(os.path.join(PROC_DIR, str(pid), "io"), "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return {}
+    return {k: int(v) for k, _, v in (line.partition(":") for line in lines)}
+
+
+class ResourceUsage(NamedTuple):
+    """OS-level resource usage of a process tree."""
+
+    user_seconds: float = 0.0
+    sys_seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+    major_faults: int = 0
+    voluntary_switches: int = 0
+    involuntary_switches: int = 0
+    read_bytes: int = 0
+    write_bytes: int = 0
+
+    def combine(self, other: "ResourceUsage") -> "ResourceUsage":
+        """
+        Combine two views of the same tree, keeping the larger of each counter.
+
+        Args:
+            other (ResourceUsage): Another measurement of the tree.
+
+        Returns:
+            ResourceUsage: The element-wise maximum.
+        """
+        return ResourceUsage(*map(max, self, other))
+
+    def add(self, other: "ResourceUsage") -> "ResourceUsage":
+        """
+        Total the usage of two successive trees, such as a run and its retry.
+
+        Args:
+            other (ResourceUsage): Usage of the other tree.
+
+        Returns:
+            ResourceUsage: The element-wise sum, but with the larger peak RSS.
+        """
+        total = ResourceUsage(*(a + b for a, b in zip(self, other)))
+        return total._replace(peak_rss_mb=max(self.peak_rss_mb, other.peak_rss_mb))
+
+    @classmethod
+    def from_rusage(cls, rusage: resource.struct_rusage) -> "ResourceUsage":
+        """
+        Create a ResourceUsage from `wait4` accounting of a reaped process.
+
+        Such accounting includes every descendant that was itself reaped, like
+        KLEE's forked solvers, though its peak RSS is that of the largest single
+        process rather than of the tree.
+
+        Args:
+            rusage (resource.struct_rusage): The accounting to convert.
+
+        Returns:
+            ResourceUsage: The resource usage it describes.
+        """
+        return cls(
+            rusage.ru_utime,
+            rusage.ru_stime,
+            rusage.ru_maxrss / 1024,  # KiB on Linux.
+            rusage.ru_majflt,
+            rusage.ru_nvcsw,
+            rusage.ru_nivcsw,
+            rusage.ru_inblock * 512,  # Counted in 512-byte blocks.
+            rusage.ru_oublock * 512,
+        )
+
+
+def tree_usage(pid: int) -> ResourceUsage:
+    """
+    Measure the resource usage of a process and all of its live descendants.
+
+    CPU time and major faults include reaped children of each process, as do IO
+    counters, so work of solvers that have already exited is still counted.
+
+    Args:
+        pid (int): Process ID of the root process.
+
+    Returns:
+        ResourceUsage: Totals over the tree, with its current RSS as the peak.
+    """
+    user = system = rss_kb = faults = voluntary = involuntary = read = write = 0
+
+    for member in process_tree(pid):
+        stat = process_stat(member)
+        if stat:
+            faults += int(stat[9]) + int(stat[10])  # majflt + cmajflt
+            user += int(stat[11]) + int(stat[13])  # utime + cutime
+            system += int(stat[12]) + int(stat[14])  # stime + cstime
+
+        status = process_status(member)
+        if "VmRSS" in status:
+            rss_kb += int(status["VmRSS"].split()[0])
+        voluntary += int(status.get("voluntary_ctxt_switches", 0))
+        involuntary += int(status.get("nonvoluntary_ctxt_switches", 0))
+
+        io = process_io(member)
+        read += io.get("read_bytes", 0)
+        write += io.get("write_bytes", 0)
+
+    return ResourceUsage(
+        user / CLOCK_TICKS,
+        system / CLOCK_TICKS,
+        rss_kb / 1024,
+        faults,
+        voluntary,
+        involuntary,
+        read,
+        write,
+    )
+
+
+class ResourceSampler:
+    """
+    Periodically samples the resource usage of a process tree from /proc.
+
+    Counters only ever grow, so the sampler keeps the largest value seen of each,
+    and with it the peak RSS of the tree as a whole. What the tree does after the
+    last sample is missed, which `wait4` accounting can make up for.
+
+    Attributes:
+        pid (int): Process ID of the root process.
+        interval (float): Seconds between samples.
+        usage (ResourceUsage): Usage of the tree, as of the latest sample.
+        samples (int): Number of samples taken, so 0 if `usage` is unmeasured.
+    """
+
+    def __init__(self, pid: int, interval: float = 1.0):
+        """
+        Initialize the ResourceSampler.
+
+        Args:
+            pid (int): Process ID of the root process.
+            interval (float): Seconds between samples.
+        """
+        self.pid = pid
+        self.interval = interval
+        self.usage = ResourceUsage()
+        self.samples = 0
+
+    def sample(self) -> ResourceUsage:
+        """
+        Take a sample now.
+
+        Returns:
+            ResourceUsage: Usage of the tree, including this sample.
+        """
+        self.usage = self.usage.combine(tree_usage(self.pid))
+        self.samples += 1
+        return self.usage
+
+    @contextmanager
+    def sampling(self) -> Iterator["ResourceSampler"]:
+        """Context manager that samples in a background thread for its duration."""
+        stop = threading.Event()
+
+        def poll() -> None:
+            while True:
+                self.sample()
+                if stop.wait(self.interval):
+                    return
+
+        thread = threading.Thread(
+            target=poll, name=f"klee-sampler-{self.pid}", daemon=True
+        )
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
+
+    @asynccontextmanager
+    async def sampling_async(self) -> AsyncIterator["ResourceSampler"]:
+        """
+        Async context manager that samples from an asyncio task for its duration,
+        reading /proc in the loop's worker threads rather than a thread of its own.
+        """
+
+        async def poll() -> None:
+            while True:
+                await asyncio.to_thread(self.sample)
+                await asyncio.sleep(self.interval)
+
+        task = asyncio.create_task(poll())
+        try:
+            yield self
+        finally:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+
+class PhysicalCore(NamedTuple):
+    """A physical CPU core and its SMT sibling hardware threads."""
+
+    cpus: Tuple[int, ...]  # Logical CPUs of the core, lowest first.
+    node: int  # NUMA node of the core.
+
+
+def parse_cpu_list(cpu_list: str) -> List[int]:
+    """
+    Parse a kernel CPU list, such as "0-3,8,10-11".
+
+    Args:
+        cpu_list (str): The CPU list to parse.
+
+    Returns:
+        List[int]: The listed CPUs, in ascending order.
+    """
+    cpus = set()
+    for part in filter(None, cpu_list.strip().split(",")):
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return sorted(cpus)
+
+
+def _cpu_node(cpu: int) -> int:
+    for entry in os.listdir(os.path.join(SYS_CPU_DIR, f"cpu{cpu}")):
+        if entry.startswith("node") and entry[4:].isdigit():
+            return int(entry[4:])
+    return 0  # Kernels without NUMA support expose no node links.
+
+
+def _cgroup_cpus() -> Optional[List[int]]:
+    """
+    Read the CPUs of this process's cgroup cpuset, under cgroup v2 or v1.
+
+    Returns:
+        Optional[List[int]]: The cpuset's CPUs, or None if none can be read.
+    """
+    try:
+        with open(os.path.join(PROC_DIR, "self", "cgroup"), "r") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+
+    paths = []
+    for line in lines:
+        _, controllers, group = line.split(":", 2)
+        group = group.lstrip("/")
+        if not controllers:
+            paths.append(os.path.join(CGROUP_DIR, group, "cpuset.cpus.effective"))
+        elif "cpuset" in controllers.split(","):
+            paths.append(os.path.join(CGROUP_DIR, "cpuset", group, "cpuset.effective_cpus"))
+
+    for path in paths:
+        try:
+            with open(path, "r") as f:
+                cpus = parse_cpu_list(f.read())
+        except OSError:
+            continue
+        if cpus:
+            return cpus
+    return None
+
+
+def usable_cpus() -> Set[int]:
+    """
+    Get the CPUs this process's cgroup may use: online CPUs within its cpuset.
+
+    Unlike the scheduler affinity, this does not shrink when the harness pins
+    itself to a subset of cores.
+
+    Returns:
+        Set[int]: The usable CPUs.
+    """
+    with open(os.path.join(SYS_CPU_DIR, "online"), "r") as f:
+        cpus = set(parse_cpu_list(f.read()))
+
+    cpuset = _cgroup_cpus()
+    if cpuset is not None and cpus.intersection(cpuset):
+        cpus.intersection_update(cpuset)
+    return cpus
+
+
+def physical_cores() -> List[PhysicalCore]:
+    """
+    Get the physical cores this process's cgroup may run on, from /sys topology.
+
+    Cores are only included if all of their SMT siblings are usable, so that a
+    core handed out is never shared with a hardware thread outside our control.
+
+    Returns:
+        List[PhysicalCore]: The usable physical cores, ordered by lowest CPU.
+    """
+    allowed = usable_cpus()
+    cores = {}
+
+    for cpu in sorted(allowed):
+        topology = os.path.join(SYS_CPU_DIR, f"cpu{cpu}", "topology")
+        with open(os.path.join(topology, "thread_siblings_list"), "r") as f:
+            siblings = tuple(parse_cpu_list(f.read()))
+
+        if siblings not in cores and allowed.issuperset(siblings):
+            cores[siblings] = PhysicalCore(siblings, _cpu_node(cpu))
+
+    return list(cores.values())
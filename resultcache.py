@@ -0,0 +1,212 @@
+"""A persistent, content-addressed cache of KLEE run results."""
+
+from kresult import KResult, KRunField
+from runklee import PHASE_FIELDS, USAGE_FIELDS, KleeRunner
+from util import klee_exec_path
+
+import hashlib
+import json
+import os
+import threading
+
+from typing import Dict, List, Optional, Tuple
+
+# Arguments that place a run without affecting what KLEE explores.
+PLACEMENT_ARGS = ("--output-dir=", "--run-in-dir=")
+
+# Harness fields describing one execution of a run, rather than its results.
+EXECUTION_FIELDS = [
+    KRunField.CPUS,
+    KRunField.NUMA_NODE,
+    KRunField.STOP_REASON,
+    KRunField.STOP_TIME,
+    *USAGE_FIELDS,
+    *PHASE_FIELDS,
+]
+
+
+class ResultCache:
+    """
+    A cache of KLEE results, keyed by everything that determines a run.
+
+    The key hashes the KLEE command (minus arguments that only place the run, such
+    as its output directory) together with the contents of the KLEE binary, the
+    program bitcode, the environment file and any state or replay inputs. Entries
+    are JSON files whose modification times track recency, and least recently
+    used entries are evicted once the cache outgrows its size cap. Entries hold
+    KLEE's results only: where, how long and at what cost the original run
+    executed is not stored, and results served from the cache are marked Cached.
+
+    Runs are only cached if they are deterministic and their results are all they
+    produce: time-limited runs need `cache_timed`, and runs that may be stopped
+    early or are asked to keep output directories, query logs or state files are
+    never cached.
+
+    Attributes:
+        root (str): Directory holding cache entries.
+        max_bytes (int): Total size of entries beyond which eviction starts.
+        cache_timed (bool): Whether time-limited runs may be cached.
+    """
+
+    def __init__(
+        self,
+        root: str = "klee-cache",
+        max_bytes: int = 256 * 1024 * 1024,
+        cache_timed: bool = False,
+    ):
+        """
+        Initialize the ResultCache.
+
+        Args:
+            root (str): Directory holding cache entries.
+            max_bytes (int): Total size of entries beyond which eviction starts.
+            cache_timed (bool): Whether time-limited runs may be cached, despite
+                their results depending on machine speed and load.
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.cache_timed = cache_timed
+
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file_hashes: Dict[str, Tuple[int, int, str]] = {}
+
+    def _hash_file(self, path: str) -> str:
+        """Hash a file's contents, memoised on its size and modification time."""
+        st = os.stat(path)
+        memo = self._file_hashes.get(path)
+        if memo is not None and memo[:2] == (st.st_size, st.st_mtime_ns):
+            return memo[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+
+        self._file_hashes[path] = (st.st_size, st.st_mtime_ns, digest.hexdigest())
+        return digest.hexdigest()
+
+    def key(self, runner: KleeRunner) -> Optional[str]:
+        """
+        Compute the cache key of a run.
+
+        Args:
+            runner (KleeRunner): The runner to compute the key for.
+
+        Returns:
+            Optional[str]: The cache key, or None if the run is not cacheable.
+        """
+        o = runner.options
+        produces_artifacts = (
+            not o.removeOutput
+            or o.logFile is not None
+            or o.debugDumpZ3File is not None
+            or o.stateOutputFile is not None
+            or o.trOutputFile is not None
+        )
+        if produces_artifacts or (o.timeToRun and not self.cache_timed):
+            return None
+        if runner.stopping is not None:
+            return None  # Where the run stops depends on timing.
+
+        command = runner.get_run_command()
+        klee = klee_exec_path("klee")
+        argv: List[str] = [
+            arg
+            for arg in command[command.index(klee) :]  # Drop any taskset prefix.
+            if not arg.startswith(PLACEMENT_ARGS)
+        ]
+
+        inputs = [klee, o.envFile, o.stateInputFile, o.trInputFile]
+        inputs += [arg for arg in argv if arg.endswith(".bc")]
+
+        material = {
+            "argv": argv,
+            "files": {p: self._hash_file(p) for p in inputs if p is not None},
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def lookup(self, runner: KleeRunner) -> Optional[KResult]:
+        """
+        Look up the stored results of a run.
+
+        Args:
+            runner (KleeRunner): The runner to look up.
+
+        Returns:
+            Optional[KResult]: The stored results, or None on a miss.
+        """
+        key = self.key(runner)
+        if key is None:
+            return None
+
+        with self._lock:
+            try:
+                with open(self._path(key), "r") as f:
+                    results = KResult.from_json(f.read())
+                os.utime(self._path(key))  # Mark as recently used.
+            except FileNotFoundError:
+                return None
+
+        results.set(KRunField.CACHED, True)
+        if runner.logger is not None:
+            runner.logger.log_and_print(
+                f"Using cached results for {runner.options.name} ({key})."
+            )
+        return results
+
+    def store(self, runner: KleeRunner, results: KResult) -> None:
+        """
+        Store the results of a run, evicting old entries if over the size cap.
+
+        Args:
+            runner (KleeRunner): The runner that produced the results.
+            results (KResult): The results to store.
+        """
+        key = self.key(runner)
+        if key is None:
+            return
+
+        entry = KResult.from_json(results.to_json())
+        for field in EXECUTION_FIELDS:
+            entry.unset(field)
+
+        with self._lock:
+            tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(entry.to_json())
+            os.replace(tmp_path, self._path(key))
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(".json"):
+                st = entry.stat()
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def run(self, runner: KleeRunner) -> KResult:
+        """
+        Execute a run, unless its results are already cached.
+
+        Args:
+            runner (KleeRunner): The runner to execute.
+
+        Returns:
+            KResult: The cached or freshly computed results.
+        """
+        results = self.lookup(runner)
+        if results is None:
+            results = runner.run()
+            self.store(runner, results)
+        return results
@@ -1,14 +1,43 @@
 """Run a configured KLEE on Coreutils programs."""
 
-from kresult import KResult
+from kresult import KResult, KResultField, KRunField
+from kstats import format_value, kresult_from_run_stats
+from monitor import CoveragePlateau, StatsMonitor, StatsUpdate
+from querylog import LogCompression
+from reaper import OutputReaper
+from resources import ResourceSampler, ResourceUsage, tree_rss_mb
+from scratch import ScratchSpace
 from util import ProgressLogger, klee_exec_path, coreutils_src_path
 
+import asyncio
 import datetime
+import os
+import shlex
+import signal
+import sqlite3
 import subprocess
+import threading
+import time
 
+from contextlib import asynccontextmanager, contextmanager, nullcontext
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from journal import CampaignJournal
+    from kseries import KResultSeries
+    from resultcache import ResultCache
 
 
 class Solver(Enum):
@@ -135,6 +164,10 @@ class KleeCommandBuilder:
         self.command.append(s)
         return self
 
+    def split(self, s: str) -> "KleeCommandBuilder":
+        self.command.extend(shlex.split(s))
+        return self
+
     def arg(self, k: str, v: Any) -> "KleeCommandBuilder":
         self.command.append(f"--{k}={v}")
         return self
@@ -146,8 +179,30 @@ class KleeCommandBuilder:
             self.command.append(f"--{key}={value if value is not None else optional}")
         return self
 
-    def build(self) -> str:
-        return " ".join(filter(bool, self.command))
+    def build(self) -> List[str]:
+        return list(filter(bool, self.command))
+
+
+# Harness fields recording each ResourceUsage measurement, in order.
+USAGE_FIELDS = [
+    KRunField.OS_USER_SECONDS,
+    KRunField.OS_SYS_SECONDS,
+    KRunField.PEAK_RSS_MIB,
+    KRunField.MAJOR_FAULTS,
+    KRunField.VOLUNTARY_SWITCHES,
+    KRunField.INVOLUNTARY_SWITCHES,
+    KRunField.READ_BYTES,
+    KRunField.WRITE_BYTES,
+]
+
+# Harness fields recording the time spent in each phase of a run, in order.
+PHASE_FIELDS = [
+    KRunField.TPREPARE_SECONDS,  # Removing any previous output directory.
+    KRunField.TKLEE_SECONDS,  # KLEE itself.
+    KRunField.TSTATS_SECONDS,  # Reading run.stats, or running `klee-stats`.
+    KRunField.TPARSE_SECONDS,  # Parsing `klee-stats` output.
+    KRunField.TCLEANUP_SECONDS,  # Moving the query log and removing output.
+]
 
 
 class KleeRunner:
@@ -159,10 +214,48 @@ class KleeRunner:
     Attributes:
         options (KleeRunOptions): Configuration options for the KLEE run.
         logger (Optional[ProgressLogger]): Logger for progress information.
+        process (Optional[subprocess.Popen]): The KLEE process, once started.
+        cpus (Optional[List[int]]): CPUs that KLEE, and any solver processes it
+            forks, are pinned to. None leaves placement to the OS scheduler.
+        use_klee_stats (bool): Whether to summarise statistics with the
+            `klee-stats` tool, rather than reading run.stats in-process.
+        record_series (bool): Whether to keep every statistics snapshot of the
+            run, before its output directory is cleaned up.
+        series (Optional[KResultSeries]): The snapshots, once recorded. They are
+            also attached to the run's results.
+        monitor (Optional[StatsMonitor]): Monitor that reports the run's
+            statistics while KLEE is running.
+        stopping (Optional[CoveragePlateau]): Policy that halts KLEE early once
+            its coverage stops improving.
+        stopped (Optional[Tuple[str, float]]): Why and at what wall-clock time
+            into the run KLEE was asked to halt, if it was stopped early.
+        sample_interval (Optional[float]): Seconds between /proc samples of the
+            KLEE process tree's resource usage, or None to not sample it.
+        usage (Optional[ResourceUsage]): OS-level resource usage of the KLEE
+            process tree, once it has exited.
+        timings (Dict[KRunField, float]): Seconds spent in each phase of the
+            latest run, keyed by its field in PHASE_FIELDS.
+        reaper (Optional[OutputReaper]): Reaper that deletes output directories
+            in the background, rather than before or after the run.
+        scratch (Optional[ScratchSpace]): In-memory space that KLEE writes its
+            output to, from which only selected artifacts are kept.
+        log_compression (Optional[LogCompression]): Compression that the query
+            log is streamed through to `logFile`, rather than moved as is.
     """
 
     def __init__(
-        self, options: KleeRunOptions, logger: Optional[ProgressLogger] = None
+        self,
+        options: KleeRunOptions,
+        logger: Optional[ProgressLogger] = None,
+        cpus: Optional[List[int]] = None,
+        use_klee_stats: bool = False,
+        record_series: bool = False,
+        monitor: Optional[StatsMonitor] = None,
+        stopping: Optional[CoveragePlateau] = None,
+        sample_interval: Optional[float] = 1.0,
+        reaper: Optional[OutputReaper] = None,
+        scratch: Optional[ScratchSpace] = None,
+        log_compression: Optional[LogCompression] = None,
     ):
         """
         Initialize the KleeRunner.
@@ -170,16 +263,51 @@ class KleeRunner:
         Args:
             options (KleeRunOptions): Configuration options for the KLEE run.
             logger (Optional[ProgressLogger]): Logger for progress information.
+            cpus (Optional[List[int]]): CPUs to pin the KLEE process tree to.
+            use_klee_stats (bool): Whether to always use `klee-stats`, which is
+                otherwise only a fallback for when run.stats cannot be read.
+            record_series (bool): Whether to keep every statistics snapshot,
+                e.g. to derive results at several budgets from one run.
+            monitor (Optional[StatsMonitor]): Monitor for live statistics.
+            stopping (Optional[CoveragePlateau]): Policy for stopping KLEE early.
+            sample_interval (Optional[float]): Seconds between resource usage
+                samples, or None to only account for usage when KLEE exits.
+            reaper (Optional[OutputReaper]): Reaper for output directories.
+            scratch (Optional[ScratchSpace]): In-memory space for KLEE's output.
+            log_compression (Optional[LogCompression]): Compression of the query
+                log, which is then written to `logFile` plus the codec's suffix.
         """
         self.options = options
         self.logger = logger
-
-    def get_run_command(self) -> str:
+        self.cpus = cpus
+        self.use_klee_stats = use_klee_stats
+        self.record_series = record_series
+        self.series: Optional["KResultSeries"] = None
+        self.monitor = monitor
+        self.stopping = stopping
+        self.stopped: Optional[Tuple[str, float]] = None
+        self._history: List[KResult] = []
+        self.sample_interval = sample_interval
+        self.usage: Optional[ResourceUsage] = None
+        self.timings: Dict[KRunField, float] = {}
+        self.reaper = reaper
+        self.scratch = scratch
+        self._scratch_dir: Optional[str] = None
+        self.log_compression = log_compression
+        self.process: Optional[subprocess.Popen] = None
+        self._reaping = threading.Lock()  # Held while KLEE's PID is reaped.
+
+    @property
+    def output_dir(self) -> str:
+        """The directory KLEE writes to: a scratch directory, or `dirName`."""
+        return self._scratch_dir or self.options.dirName
+
+    def get_run_command(self) -> List[str]:
         """
         Generate the KLEE run command based on the configuration options.
 
         Returns:
-            str: The constructed KLEE run command.
+            List[str]: The constructed KLEE run command, as an argument vector.
         """
 
         o = self.options
@@ -187,13 +315,19 @@ class KleeRunner:
         # Prevent indefinite run:
         assert o.timeToRun or o.instructions
 
+        # Affinity is inherited across fork, so forked solvers are pinned too.
+        pinning = ""
+        if self.cpus:
+            pinning = f"taskset --cpu-list {','.join(map(str, self.cpus))}"
+
         return (
             KleeCommandBuilder()
+            .split(pinning)
             .append(klee_exec_path("klee"))
             # --- Options start ---
             .arg("env-file", o.envFile)
             .arg("run-in-dir", o.runInDir)
-            .arg("output-dir", o.dirName)
+            .arg("output-dir", self.output_dir)
             .arg("solver-backend", o.solver.value)
             .opt_arg("max-solver-time", o.solverTimeout)
             .arg("simplify-sym-indices", o.simplifySymIndices)
@@ -223,7 +357,7 @@ class KleeRunner:
             .arg("max-static-cpfork-pct", o.maxStaticCpforkPct)
             .arg("switch-type", o.switchType)
             .arg("dump-states-on-halt", o.dumpStates)
-            .append(o.searchStrategy.value)
+            .split(o.searchStrategy.value)
             .opt_arg("use-batching-search", o.batchingInstrs, True)
             .opt_arg("batch-instructions", o.batchingInstrs)
             .opt_arg("debug-z3-dump-queries", o.debugDumpZ3File)
@@ -231,10 +365,10 @@ class KleeRunner:
             .opt_arg("tr-output", o.trOutputFile)
             .opt_arg("state-input", o.stateInputFile)
             .opt_arg("tr-input", o.trInputFile)
-            .append(o.additionalOptions)
+            .split(o.additionalOptions)
             # --- Options end ---
             .append(coreutils_src_path(o.name))
-            .append(sym_args_for_program(o.name))
+            .split(sym_args_for_program(o.name))
             .build()
         )
 
@@ -244,11 +378,18 @@ class KleeRunner:
         """
         import os, shutil
 
+        # Place KLEE's output in memory, if there is room.
+        if self.scratch is not None:
+            self._scratch_dir = self.scratch.place(self.options.dirName)
+
         # Remove existing output directory, if it exists.
+        if self.reaper is not None:
+            self.reaper.discard(self.options.dirName)  # Deleted in the background.
+            return
         if os.path.exists(self.options.dirName) and os.path.isdir(self.options.dirName):
             shutil.rmtree(self.options.dirName)
 
-    def log_command(self, command: str) -> None:
+    def log_command(self, command: List[str]) -> None:
         """
         Log the KLEE run command if a logger is available.
 
@@ -257,7 +398,32 @@ class KleeRunner:
         """
         if self.logger is not None:
             now = datetime.datetime.now()
-            self.logger.log_and_print(f"At {now}, running command...\n{command}")
+            self.logger.log_and_print(
+                f"At {now}, running command...\n{shlex.join(command)}"
+            )
+
+    def _kill(self) -> None:
+        """Kill KLEE's process group, including any orphaned solver processes."""
+        if self.process is None:
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def get_stats_command(self) -> List[str]:
+        """
+        Generate the `klee-stats` command that summarises the run's statistics.
+
+        Returns:
+            List[str]: The `klee-stats` command, printing all columns as CSV.
+        """
+        return [
+            klee_exec_path("klee-stats"),
+            "--table-format=csv",
+            "--print-all",
+            self.output_dir,
+        ]
 
     def save_stats(self) -> str:
         """
@@ -268,29 +434,248 @@ class KleeRunner:
         """
         klee_stats_path = f"{self.options.dirName}.stats.csv"
 
-        command = [
-            klee_exec_path("klee-stats"),
-            "--table-format=csv",
-            "--print-all",
-            self.options.dirName,
-        ]
-
         with open(klee_stats_path, "w") as f:
-            subprocess.run(command, stdout=f)
+            subprocess.run(self.get_stats_command(), stdout=f)
 
         return klee_stats_path
 
+    def read_stats(self) -> Optional[KResult]:
+        """
+        Read KLEE statistics from run.stats in-process, also saving them as CSV.
+
+        Returns:
+            Optional[KResult]: The results of the KLEE run, or None if they should
+            be (or could only be) summarised by `klee-stats` instead.
+        """
+        if self.use_klee_stats:
+            return None
+
+        try:
+            results = kresult_from_run_stats(self.output_dir)
+        except (sqlite3.Error, ValueError) as e:
+            if self.logger is not None:
+                self.logger.log_and_print(f"Falling back to klee-stats: {e}")
+            return None
+
+        results.to_csv(f"{self.options.dirName}.stats.csv")
+        return results
+
+    def load_series(self) -> None:
+        """
+        Load every statistics snapshot of the run, if asked to record them.
+
+        The series is left as None if run.stats is missing or unreadable.
+        """
+        if not self.record_series:
+            return
+
+        from kseries import KResultSeries  # Only series need NumPy.
+
+        try:
+            self.series = KResultSeries.from_run_stats(self.output_dir)
+        except (sqlite3.Error, ValueError) as e:
+            if self.logger is not None:
+                self.logger.log_and_print(f"Could not record statistics series: {e}")
+
+    def _halt(self) -> None:
+        """Ask KLEE to halt gracefully, as on Ctrl-C, so it still writes stats."""
+        with self._reaping:
+            # Once reaped, KLEE's PID may have been reused by another process.
+            if self.process is None or self.process.returncode is not None:
+                return
+            try:
+                # Signal the whole group: with --watchdog, KLEE's PID is a parent
+                # that only waits for the interpreter it forked.
+                os.killpg(os.getpgid(self.process.pid), signal.SIGINT)
+            except ProcessLookupError:
+                pass
+
+    def _check_stopping(self, update: StatsUpdate) -> None:
+        """Halt KLEE once the stopping policy fires on the latest statistics."""
+        if self.stopped is not None:
+            return
+
+        self._history.append(update.result)
+        reason = self.stopping.should_stop(self._history)
+        if reason is not None:
+            self.stopped = (reason, update.result.get(KResultField.TIME))
+            if self.logger is not None:
+                self.logger.log_and_print(f"[{self.options.name}] {reason}, halting")
+            self._halt()
+
+    def watch(self) -> ContextManager[None]:
+        """
+        Monitor the run's statistics, if a monitor or stopping policy is set.
+
+        Returns:
+            ContextManager[None]: Context that the KLEE process runs within.
+        """
+        if self.stopping is None:
+            if self.monitor is None:
+                return nullcontext()
+            return self.monitor.watch(self.options.name, self.output_dir, self.logger)
+
+        self.stopped, self._history = None, []
+        if self.monitor is None:
+            # Watch silently, only to drive the stopping policy.
+            return StatsMonitor(self.stopping.interval).watch(
+                self.options.name, self.output_dir, callback=self._check_stopping
+            )
+        return self.monitor.watch(
+            self.options.name,
+            self.output_dir,
+            self.logger,
+            self._check_stopping,
+        )
+
+    def sampling(self) -> ContextManager[ResourceSampler]:
+        """
+        Sample the KLEE process tree's resource usage, if sampling is enabled.
+
+        Returns:
+            ContextManager[ResourceSampler]: Context that the KLEE process runs
+            within, yielding the sampler.
+        """
+        sampler = ResourceSampler(self.process.pid, self.sample_interval or 0.0)
+        if self.sample_interval is None:
+            return nullcontext(sampler)
+        return sampler.sampling()
+
+    def _wait(self) -> ResourceUsage:
+        """
+        Wait for KLEE to exit, collecting its `wait4` resource accounting.
+
+        Returns:
+            ResourceUsage: Usage of KLEE and every descendant it reaped.
+        """
+        # Wait without reaping, so that KLEE's PID stays valid for `_halt`.
+        os.waitid(os.P_PID, self.process.pid, os.WEXITED | os.WNOWAIT)
+        with self._reaping:
+            _, status, rusage = os.wait4(self.process.pid, 0)
+            self.process.returncode = os.waitstatus_to_exitcode(status)
+        return ResourceUsage.from_rusage(rusage)
+
+    def add_usage(self, usage: ResourceUsage) -> None:
+        """
+        Add the resource usage of an attempt at the run to that of earlier ones.
+
+        Args:
+            usage (ResourceUsage): Usage of the latest attempt.
+        """
+        self.usage = usage if self.usage is None else self.usage.add(usage)
+
+    def record_usage(self, results: KResult) -> None:
+        """
+        Record in the results the OS-level resource usage of the run, if known.
+
+        Args:
+            results (KResult): The results of the KLEE run.
+        """
+        if self.usage is not None:
+            for field, value in zip(USAGE_FIELDS, self.usage):
+                results.set(field, format_value(value))
+
+    @contextmanager
+    def timed(self, phase: KRunField) -> Iterator[None]:
+        """
+        Context manager that adds the time spent within it to a phase's timing.
+
+        Args:
+            phase (KRunField): The phase, one of PHASE_FIELDS.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[phase] = self.timings.get(phase, 0.0) + elapsed
+
+    def record_timings(self, results: KResult) -> None:
+        """
+        Record in the results the time spent in each phase of the run.
+
+        Args:
+            results (KResult): The results of the KLEE run.
+        """
+        for field, seconds in self.timings.items():
+            results.set(field, format_value(seconds))
+
+    def record_cpus(self, results: KResult) -> None:
+        """
+        Record in the results the CPUs KLEE was pinned to, if it was pinned.
+
+        Args:
+            results (KResult): The results of the KLEE run.
+        """
+        if self.cpus:
+            results.set(KRunField.CPUS, ",".join(map(str, self.cpus)))
+
+    def record_stop(self, results: KResult) -> None:
+        """
+        Record in the results why and when KLEE was stopped early, if it was.
+
+        Args:
+            results (KResult): The results of the KLEE run.
+        """
+        if self.stopped is not None:
+            reason, stop_time = self.stopped
+            results.set(KRunField.STOP_REASON, reason)
+            results.set(KRunField.STOP_TIME, stop_time)
+
+    def spilled(self) -> bool:
+        """
+        Check whether KLEE's scratch space filled up, dropping its output if so.
+
+        Returns:
+            bool: Whether the run must be repeated on disk.
+        """
+        if self._scratch_dir is None:
+            return False
+        if not self.scratch.filled(self._scratch_dir, self.process.returncode):
+            return False
+
+        if self.logger is not None:
+            self.logger.log_and_print(
+                f"[{self.options.name}] Scratch space filled up, rerunning on disk"
+            )
+        self.scratch.drop(self._scratch_dir)
+        self._scratch_dir = None
+        return True
+
+    @contextmanager
+    def on_disk(self) -> Iterator[None]:
+        """Context manager within which runs write their output to disk."""
+        scratch, self.scratch = self.scratch, None
+        try:
+            yield
+        finally:
+            self.scratch = scratch
+
     def cleanup(self) -> None:
         """
         Perform cleanup operations after the KLEE run, by renaming log files
         and removing the output directory if specified.
         """
-        if self.options.logFile is not None:
-            logPath = f"{self.options.dirName}/all-queries.smt2"
-            subprocess.run(["mv", logPath, self.options.logFile])
+        logPath = f"{self.output_dir}/all-queries.smt2"
+        # KLEE may have crashed before writing its query log.
+        if self.options.logFile is not None and os.path.exists(logPath):
+            if self.log_compression is not None:
+                self.log_compression.compress(logPath, self.options.logFile)
+                os.remove(logPath)
+            else:
+                subprocess.run(["mv", logPath, self.options.logFile])
+
+        if self._scratch_dir is not None:
+            if not self.options.removeOutput:
+                self.scratch.collect(self._scratch_dir, self.options.dirName)
+            self.scratch.drop(self._scratch_dir)
+            self._scratch_dir = None
 
         if self.options.removeOutput:
-            subprocess.run(["rm", "-rf", self.options.dirName])
+            if self.reaper is not None:
+                self.reaper.discard(self.options.dirName)
+            else:
+                subprocess.run(["rm", "-rf", self.options.dirName])
 
     def run(self) -> KResult:
         """
@@ -299,25 +684,252 @@ class KleeRunner:
         Returns:
             KResult: The results of the KLEE run.
         """
-        self.prepare()
+        self.timings, self.usage = {}, None
+        return self._attempt()
+
+    def _attempt(self) -> KResult:
+        """
+        Make an attempt at the run, which is repeated on disk should scratch
+        space fill up. Timings and usage of every attempt are added together.
+
+        Returns:
+            KResult: The results of the KLEE run.
+        """
+        with self.timed(KRunField.TPREPARE_SECONDS):
+            self.prepare()
 
         command = self.get_run_command()
         self.log_command(command)
 
-        subprocess.run(
-            command, shell=True, check=False
-        )  # TODO: Report error instead of setting check=False.
+        # Exec KLEE directly as the leader of its own process group, so that
+        # signals reach it (and its forked solvers) rather than a shell.
+        self.process = subprocess.Popen(command, start_new_session=True)
+        try:
+            with self.timed(KRunField.TKLEE_SECONDS):
+                with self.watch(), self.sampling() as sampler:
+                    reaped = self._wait()  # TODO: Report error on non-zero exit.
+        except BaseException:
+            self._kill()  # Don't leave KLEE running if the harness is interrupted.
+            if self._scratch_dir is not None:
+                self.scratch.drop(self._scratch_dir)
+            raise
+        self.add_usage(sampler.usage.combine(reaped))
+
+        with self.timed(KRunField.TCLEANUP_SECONDS):
+            spilled = self.spilled()
+        if spilled:
+            with self.on_disk():
+                return self._attempt()
+
+        with self.timed(KRunField.TSTATS_SECONDS):
+            results = self.read_stats()
+            if results is None:
+                stats_path = self.save_stats()
+        if results is None:
+            with self.timed(KRunField.TPARSE_SECONDS):
+                results = KResult.from_csv(stats_path)
+
+        self.record_cpus(results)
+        self.record_stop(results)
+        self.record_usage(results)
+
+        with self.timed(KRunField.TSTATS_SECONDS):
+            self.load_series()
+        results.series = self.series
+        with self.timed(KRunField.TCLEANUP_SECONDS):
+            self.cleanup()
+        self.record_timings(results)
 
-        klee_stats_path = self.save_stats()
-        results = KResult.from_csv(klee_stats_path)
+        return results
 
-        self.cleanup()
 
-        return results
+class KleeRunStatus(Enum):
+    """Stages reported by an in-flight asynchronous KLEE run."""
+
+    STARTED = "started"
+    RUNNING = "running"
+    FINISHED = "finished"
+
+
+@dataclass
+class KleeRunEvent:
+    """A status update streamed from an asynchronous KLEE run."""
+
+    status: KleeRunStatus
+    elapsed: float  # Seconds since KLEE was started.
+    pid: int
+    rss: Optional[float] = None  # MiB held by the KLEE process tree.
+    result: Optional[KResult] = None  # Only set once FINISHED.
+
+
+class AsyncKleeRunner(KleeRunner):
+    """
+    An asyncio-native KleeRunner, so that one event loop can supervise many runs.
+
+    As with KleeRunner, KLEE leads its own process group. Cancelling the task
+    driving the run kills the whole group, including forked solvers, and still
+    calls `cleanup()`. Blocking steps around the run, like deleting output
+    directories and compressing query logs, run in worker threads so that they
+    never stall the event loop.
+
+    Attributes:
+        progress_interval (float): Seconds between RUNNING events.
+    """
+
+    def __init__(self, *args, progress_interval: float = 5.0, **kwargs):
+        """
+        Initialize the AsyncKleeRunner.
+
+        Args:
+            *args, **kwargs: As for KleeRunner.
+            progress_interval (float): Seconds between RUNNING events.
+        """
+        super().__init__(*args, **kwargs)
+        self.progress_interval = progress_interval
+
+    @asynccontextmanager
+    async def _sampling(self) -> AsyncIterator[ResourceSampler]:
+        """Sample the KLEE process tree from the event loop, if sampling is enabled."""
+        sampler = ResourceSampler(self.process.pid, self.sample_interval or 0.0)
+        if self.sample_interval is None:
+            yield sampler
+            return
+        async with sampler.sampling_async():
+            yield sampler
+
+    async def _save_stats(self) -> str:
+        klee_stats_path = f"{self.options.dirName}.stats.csv"
+
+        with open(klee_stats_path, "w") as f:
+            stats = await asyncio.create_subprocess_exec(
+                *self.get_stats_command(), stdout=f
+            )
+            await stats.wait()
+
+        return klee_stats_path
+
+    @asynccontextmanager
+    async def stream(self) -> AsyncIterator[AsyncIterator[KleeRunEvent]]:
+        """
+        Context manager that executes the KLEE run, giving its status events.
+
+        Leaving the block before the FINISHED event kills KLEE and cleans up its
+        output then and there, rather than whenever the events are finalised.
+
+        Yields:
+            AsyncIterator[KleeRunEvent]: A STARTED event, RUNNING events every
+            `progress_interval` seconds, and a FINISHED event with the results.
+            Should scratch space fill up, the run restarts on disk with a new
+            STARTED event.
+        """
+        self.timings, self.usage = {}, None
+        events = self._stream_attempt()
+        try:
+            yield events
+        finally:
+            await events.aclose()
+
+    async def _stream_attempt(self) -> AsyncIterator[KleeRunEvent]:
+        """
+        Make an attempt at the run, yielding its status events. Should scratch
+        space fill up, events of an attempt on disk follow.
+        """
+        with self.timed(KRunField.TPREPARE_SECONDS):
+            await asyncio.to_thread(self.prepare)
+
+        command = self.get_run_command()
+        self.log_command(command)
+
+        rerun = False
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *command, start_new_session=True
+            )
+            pid, start = self.process.pid, time.monotonic()
+            yield KleeRunEvent(KleeRunStatus.STARTED, 0.0, pid)
+
+            with self.timed(KRunField.TKLEE_SECONDS):
+                with self.watch():
+                    async with self._sampling() as sampler:
+                        while self.process.returncode is None:
+                            try:
+                                await asyncio.wait_for(
+                                    self.process.wait(),
+                                    timeout=self.progress_interval,
+                                )
+                            except asyncio.TimeoutError:
+                                elapsed = time.monotonic() - start
+                                rss = await asyncio.to_thread(tree_rss_mb, pid)
+                                yield KleeRunEvent(
+                                    KleeRunStatus.RUNNING, elapsed, pid, rss
+                                )
+
+            # The event loop reaps KLEE itself, so only /proc samples are known.
+            if sampler.samples:
+                self.add_usage(sampler.usage)
+
+            with self.timed(KRunField.TCLEANUP_SECONDS):
+                rerun = await asyncio.to_thread(self.spilled)
+            if rerun:
+                # Restart on disk, with events of the new attempt following.
+                with self.on_disk():
+                    events = self._stream_attempt()
+                    try:
+                        async for event in events:
+                            yield event
+                    finally:
+                        await events.aclose()
+                return
+
+            elapsed = time.monotonic() - start
+            with self.timed(KRunField.TSTATS_SECONDS):
+                results = await asyncio.to_thread(self.read_stats)
+                if results is None:
+                    stats_path = await self._save_stats()
+            if results is None:
+                with self.timed(KRunField.TPARSE_SECONDS):
+                    results = KResult.from_csv(stats_path)
+
+            self.record_cpus(results)
+            self.record_stop(results)
+            self.record_usage(results)
+
+            with self.timed(KRunField.TSTATS_SECONDS):
+                await asyncio.to_thread(self.load_series)
+            results.series = self.series
+        except BaseException:
+            # Cancelled, or the consumer stopped listening: leave nothing behind.
+            self._kill()
+            raise
+        finally:
+            if not rerun:  # The rerun cleans up after itself.
+                with self.timed(KRunField.TCLEANUP_SECONDS):
+                    await asyncio.to_thread(self.cleanup)
+
+        self.record_timings(results)
+
+        yield KleeRunEvent(KleeRunStatus.FINISHED, elapsed, pid, result=results)
+
+    async def run_async(self) -> KResult:
+        """
+        Execute the KLEE run with the configured options, from an event loop.
+
+        Returns:
+            KResult: The results of the KLEE run.
+        """
+        async with self.stream() as events:
+            async for event in events:
+                if event.result is not None:
+                    return event.result
+        raise RuntimeError("KLEE run finished without results")
 
 
 def run_klee(
-    options: KleeRunOptions, logger: Optional[ProgressLogger] = None
+    options: KleeRunOptions,
+    logger: Optional[ProgressLogger] = None,
+    cache: Optional["ResultCache"] = None,
+    journal: Optional["CampaignJournal"] = None,
+    record_series: bool = False,
 ) -> KResult:
     """
     Convenience function to run KLEE with the given options.
@@ -325,8 +937,55 @@ def run_klee(
     Args:
         options (KleeRunOptions): Configuration options for the KLEE run.
         logger (Optional[ProgressLogger]): Logger for progress information.
+        cache (Optional[ResultCache]): Cache to reuse identical runs' results from.
+            Runs recording a series are never answered from it, as it keeps no
+            snapshots.
+        journal (Optional[CampaignJournal]): Journal to skip runs completed before
+            a restart, and to record this run in.
+        record_series (bool): Whether to attach every statistics snapshot to the
+            results, as `KResult.series`. Results replayed from the journal
+            carry no series.
+
+    Returns:
+        KResult: The results of the KLEE run.
+    """
+    if journal is not None:
+        repetition = journal.repetition(options)
+        results = journal.completed(options, repetition)
+        if results is not None:
+            return results
+        journal.plan(options, repetition)
+
+    runner = KleeRunner(options, logger, record_series=record_series)
+    if cache is None:
+        results = runner.run()
+    elif record_series:
+        results = runner.run()
+        cache.store(runner, results)
+    else:
+        results = cache.run(runner)
+
+    if journal is not None:
+        journal.complete(options, results, repetition)
+    return results
+
+
+async def run_klee_async(
+    options: KleeRunOptions,
+    logger: Optional[ProgressLogger] = None,
+    record_series: bool = False,
+) -> KResult:
+    """
+    Convenience function to run KLEE with the given options from an event loop.
+
+    Args:
+        options (KleeRunOptions): Configuration options for the KLEE run.
+        logger (Optional[ProgressLogger]): Logger for progress information.
+        record_series (bool): Whether to attach every statistics snapshot to the
+            results, as `KResult.series`.
 
     Returns:
         KResult: The results of the KLEE run.
     """
-    return KleeRunner(options, logger).run()
+    runner = AsyncKleeRunner(options, logger, record_series=record_series)
+    return await runner.run_async()
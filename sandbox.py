@@ -0,0 +1,233 @@
+"""Isolated copies of the Coreutils sandbox for concurrent KLEE runs."""
+
+import hashlib
+import os
+import queue
+import shutil
+import stat
+import subprocess
+import tarfile
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, NamedTuple
+
+DEFAULT_TARBALL = os.path.expanduser("~/sandbox.tgz")
+DEFAULT_ROOT = "/tmp/klee-sandboxes"
+
+
+class _Entry(NamedTuple):
+    """A file system entry of the pristine sandbox."""
+
+    kind: str  # One of "dir", "file" or "symlink".
+    mode: int
+    size: int
+    content: str  # Content hash for files, link target for symlinks.
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry(path: str, st: os.stat_result) -> _Entry:
+    if stat.S_ISLNK(st.st_mode):
+        return _Entry("symlink", 0, 0, os.readlink(path))
+    if stat.S_ISDIR(st.st_mode):
+        return _Entry("dir", stat.S_IMODE(st.st_mode), 0, "")
+    return _Entry("file", stat.S_IMODE(st.st_mode), st.st_size, _hash_file(path))
+
+
+def _walk(root: str) -> Iterator[str]:
+    """Yield paths relative to `root` of every entry below it, parents first."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in dirnames + filenames:
+            yield os.path.relpath(os.path.join(dirpath, name), root)
+
+
+class SandboxPool:
+    """
+    A pool of private sandbox directories, one per concurrent KLEE run.
+
+    Copies are cloned once from a pristine extraction of the sandbox tarball
+    using copy-on-write reflinks where the file system supports them (falling
+    back to plain copies), and are restored between runs by comparing their
+    contents against hashes of the pristine tree rather than re-extracting.
+    Hardlinks are deliberately not used, as programs under test may modify
+    files in place and would then corrupt the pristine tree.
+
+    Attributes:
+        root (str): Directory holding the pristine tree and the copies.
+        pristine (str): Path to the pristine sandbox tree.
+        slots (int): Number of sandbox copies.
+    """
+
+    def __init__(
+        self,
+        slots: int,
+        tarball: str = DEFAULT_TARBALL,
+        root: str = DEFAULT_ROOT,
+    ):
+        """
+        Initialize the SandboxPool, extracting and cloning sandboxes as needed.
+
+        Args:
+            slots (int): Number of sandbox copies, usually the number of
+                concurrently running KLEE processes.
+            tarball (str): Path to the pristine sandbox tarball.
+            root (str): Directory in which to keep the sandbox copies.
+        """
+        assert slots > 0, "Expected at least one sandbox slot"
+
+        self.root = root
+        self.slots = slots
+        self.pristine = self._extract(tarball)
+        self._manifest = self._build_manifest()
+        self._ctimes: Dict[str, Dict[str, int]] = {}
+        self._free: "queue.Queue[str]" = queue.Queue()
+
+        for i in range(slots):
+            path = os.path.join(root, f"slot-{i}")
+            if os.path.isdir(path):
+                self.restore(path)
+            else:
+                self._clone(path)
+            self._free.put(path)
+
+    def _extract(self, tarball: str) -> str:
+        """
+        Extract the tarball once, reusing an earlier extraction if present.
+
+        Returns:
+            str: Path to the pristine sandbox tree.
+        """
+        extract_dir = os.path.join(self.root, "pristine")
+        marker = os.path.join(self.root, ".pristine-complete")
+
+        if not os.path.exists(marker):
+            shutil.rmtree(extract_dir, ignore_errors=True)
+            os.makedirs(extract_dir)
+            with tarfile.open(tarball) as tar:
+                tar.extractall(extract_dir)
+            open(marker, "w").close()
+
+        # The tarball from setup.sh holds a single top-level sandbox directory.
+        entries = os.listdir(extract_dir)
+        if len(entries) == 1:
+            top = os.path.join(extract_dir, entries[0])
+            if os.path.isdir(top):
+                return top
+        return extract_dir
+
+    def _build_manifest(self) -> Dict[str, _Entry]:
+        manifest = {}
+        for rel in _walk(self.pristine):
+            full = os.path.join(self.pristine, rel)
+            manifest[rel] = _entry(full, os.lstat(full))
+        return manifest
+
+    def _record_ctimes(self, path: str) -> None:
+        """Remember change times, so untouched files need not be rehashed."""
+        self._ctimes[path] = {
+            rel: os.lstat(os.path.join(path, rel)).st_ctime_ns for rel in _walk(path)
+        }
+
+    def _clone(self, path: str) -> None:
+        subprocess.run(["cp", "-a", "--reflink=auto", self.pristine, path], check=True)
+        self._record_ctimes(path)
+
+    def _restore_entry(self, path: str, rel: str, entry: _Entry) -> None:
+        src, dst = os.path.join(self.pristine, rel), os.path.join(path, rel)
+
+        if os.path.lexists(dst):
+            if os.path.isdir(dst) and not os.path.islink(dst):
+                if entry.kind == "dir":
+                    os.chmod(dst, entry.mode)
+                    return
+                shutil.rmtree(dst)
+            else:
+                os.unlink(dst)
+
+        if entry.kind == "dir":
+            os.makedirs(dst, mode=entry.mode)
+        elif entry.kind == "symlink":
+            os.symlink(entry.content, dst)
+        else:
+            shutil.copy2(src, dst)
+
+    def restore(self, path: str) -> None:
+        """
+        Return a sandbox copy to its pristine state, touching only what changed.
+
+        Args:
+            path (str): Path to the sandbox copy.
+        """
+        ctimes = self._ctimes.get(path, {})
+        seen = set()
+
+        for rel in list(_walk(path)):
+            full = os.path.join(path, rel)
+            if not os.path.lexists(full):
+                continue  # Removed along with a stray parent directory.
+
+            entry = self._manifest.get(rel)
+            if entry is None:
+                if os.path.isdir(full) and not os.path.islink(full):
+                    shutil.rmtree(full)
+                else:
+                    os.unlink(full)
+                continue
+
+            seen.add(rel)
+            st = os.lstat(full)
+            if ctimes.get(rel) == st.st_ctime_ns:
+                continue  # Neither contents nor metadata changed since restore.
+            if _entry(full, st) != entry:
+                self._restore_entry(path, rel, entry)
+
+        # Manifest keys are ordered parents first, so directories come first.
+        for rel, entry in self._manifest.items():
+            if rel not in seen:
+                self._restore_entry(path, rel, entry)
+
+        self._record_ctimes(path)
+
+    def acquire(self) -> str:
+        """
+        Take a sandbox copy from the pool, waiting for one to become free.
+
+        Returns:
+            str: Path to the acquired sandbox copy.
+        """
+        return self._free.get()
+
+    def release(self, path: str) -> None:
+        """
+        Restore a sandbox copy and return it to the pool.
+
+        Args:
+            path (str): Path to the sandbox copy, as returned by `acquire`.
+        """
+        try:
+            self.restore(path)
+        except OSError:
+            # Fall back to a fresh clone if the copy is beyond repair.
+            shutil.rmtree(path, ignore_errors=True)
+            self._clone(path)
+        self._free.put(path)
+
+    @contextmanager
+    def sandbox(self) -> Iterator[str]:
+        """
+        Context manager that holds a sandbox copy for the duration of a run.
+
+        Yields:
+            str: Path to the acquired sandbox copy.
+        """
+        path = self.acquire()
+        try:
+            yield path
+        finally:
+            self.release(path)
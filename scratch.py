@@ -0,0 +1,150 @@
+"""RAM-backed scratch space for KLEE output directories."""
+
+import errno
+import fnmatch
+import os
+import shutil
+import uuid
+
+from typing import Optional, Sequence
+
+DEFAULT_ROOT = "/dev/shm/klee-output"
+
+# Message logs in which KLEE reports failed writes to its output directory.
+MESSAGE_LOGS = ("messages.txt", "warnings.txt")
+
+# Artifacts worth keeping from a run, by default: its statistics and logs.
+DEFAULT_HARVEST = (
+    "run.stats",
+    "run.istats",
+    "info",
+    "messages.txt",
+    "warnings.txt",
+    "all-queries.smt2",
+)
+
+
+class ScratchSpace:
+    """
+    Output directories on a tmpfs mount, so KLEE's writes never touch the disk.
+
+    KLEE writes its output into a directory under `root`, which should be on a
+    size-capped tmpfs mount (such as /dev/shm). Once the run is over, only
+    artifacts matching the `harvest` patterns are copied to the run's persistent
+    output directory, and the scratch directory is dropped. Runs fall back to
+    disk when the mount has less than `reserve_mb` free before they start, and
+    are rerun on disk when their own writes to it failed for lack of space. Note
+    that tmpfs pages count as memory, which admission control should leave room
+    for.
+
+    Attributes:
+        root (str): Directory on the tmpfs mount that holds scratch directories.
+        harvest (Sequence[str]): Glob patterns, relative to the output directory,
+            of artifacts to keep, e.g. "test00000[1-5].ktest" for some tests.
+        reserve_mb (float): Free space needed on the mount to start a run in it.
+        full_mb (float): Free space below which the mount is considered full,
+            so that a run that failed just as it filled up is blamed on it.
+    """
+
+    def __init__(
+        self,
+        root: str = DEFAULT_ROOT,
+        harvest: Sequence[str] = DEFAULT_HARVEST,
+        reserve_mb: float = 1024,
+        full_mb: float = 16,
+    ):
+        """
+        Initialize the ScratchSpace.
+
+        Args:
+            root (str): Directory on the tmpfs mount that holds scratch
+                directories, created if it does not exist.
+            harvest (Sequence[str]): Glob patterns of artifacts to keep.
+            reserve_mb (float): Free space needed on the mount to start a run.
+            full_mb (float): Free space below which the mount counts as full.
+        """
+        self.root = root
+        self.harvest = list(harvest)
+        self.reserve_mb = reserve_mb
+        self.full_mb = full_mb
+
+        os.makedirs(root, exist_ok=True)
+
+    def free_mb(self) -> float:
+        """
+        Get the free space on the mount.
+
+        Returns:
+            float: Free space in MiB.
+        """
+        st = os.statvfs(self.root)
+        return st.f_bavail * st.f_frsize / 1024 / 1024
+
+    def place(self, dir_name: str) -> Optional[str]:
+        """
+        Choose a scratch directory for a run, if there is room for one.
+
+        Args:
+            dir_name (str): The run's persistent output directory.
+
+        Returns:
+            Optional[str]: A fresh scratch directory for KLEE to create, or None
+            if the run should write to `dir_name` on disk instead.
+        """
+        if self.free_mb() < self.reserve_mb:
+            return None
+        name = f"{os.path.basename(os.path.normpath(dir_name))}.{uuid.uuid4().hex}"
+        return os.path.join(self.root, name)
+
+    def filled(self, scratch_dir: str, exit_code: Optional[int]) -> bool:
+        """
+        Check whether a run's writes to its scratch directory failed for lack of
+        space. Other runs sharing the mount are unaffected by this run's verdict.
+
+        Args:
+            scratch_dir (str): The scratch directory KLEE wrote to.
+            exit_code (Optional[int]): KLEE's exit code, if known.
+
+        Returns:
+            bool: Whether the run's output may be incomplete.
+        """
+        # KLEE exits with an error once it cannot write its output streams.
+        if exit_code and self.free_mb() < self.full_mb:
+            return True
+
+        # Failures to write test cases and other files are only warned about.
+        enospc = os.strerror(errno.ENOSPC)
+        for name in MESSAGE_LOGS:
+            try:
+                with open(os.path.join(scratch_dir, name), errors="replace") as f:
+                    if any(enospc in line for line in f):
+                        return True
+            except FileNotFoundError:
+                continue
+        return False
+
+    def collect(self, scratch_dir: str, dir_name: str) -> None:
+        """
+        Copy the artifacts to keep from a scratch directory to persistent storage.
+
+        Args:
+            scratch_dir (str): The scratch directory KLEE wrote to.
+            dir_name (str): The run's persistent output directory.
+        """
+        os.makedirs(dir_name, exist_ok=True)
+        for entry in os.listdir(scratch_dir):
+            if any(fnmatch.fnmatch(entry, pattern) for pattern in self.harvest):
+                source = os.path.join(scratch_dir, entry)
+                if os.path.isdir(source):
+                    shutil.copytree(source, os.path.join(dir_name, entry))
+                else:
+                    shutil.copy2(source, dir_name)
+
+    def drop(self, scratch_dir: str) -> None:
+        """
+        Delete a scratch directory, which is quick as it lives in memory.
+
+        Args:
+            scratch_dir (str): The scratch directory to delete.
+        """
+        shutil.rmtree(scratch_dir, ignore_errors=True)
@@ -0,0 +1,445 @@
+"""Benchmark SMT solvers by replaying queries from KLEE's query logs."""
+
+from querylog import iter_queries, open_log, query_outcome
+from runklee import Solver
+from util import ResultCSVPrinter
+
+import heapq
+import json
+import math
+import os
+import statistics
+import subprocess
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# How each solver reads an SMT-LIB 2 script from standard input.
+SOLVER_ARGS: Dict[Solver, List[str]] = {
+    Solver.Z3: ["-smt2", "-in"],
+    Solver.STP: ["--SMTLIB2"],
+}
+
+# KLEE's recorded outcome of a query, as a solver would print it.
+EXPECTED = {1: "sat", 0: "unsat", -1: "unknown"}
+
+RESULT_COLUMNS = ["Query", "Solver", "Result", "Expected", "Time(s)"]
+
+
+@dataclass
+class SolverBinary:
+    """A solver executable to benchmark, e.g. one of two versions being compared."""
+
+    solver: Solver
+    path: Optional[str] = None  # The executable, found on PATH by default.
+
+    @property
+    def name(self) -> str:
+        """Name of the binary in results, unique among those benchmarked."""
+        return (
+            self.solver.value
+            if self.path is None
+            else f"{self.solver.value}:{self.path}"
+        )
+
+    @property
+    def command(self) -> List[str]:
+        """Command that solves a script given on standard input."""
+        return [self.path or self.solver.value] + SOLVER_ARGS[self.solver]
+
+    @classmethod
+    def parse(cls, spec: str) -> "SolverBinary":
+        """
+        Parse a binary given as "<solver>" or "<solver>:<path>", e.g. "z3:/opt/z3".
+
+        Args:
+            spec (str): The binary.
+
+        Returns:
+            SolverBinary: The binary.
+        """
+        solver, _, path = spec.partition(":")
+        return cls(Solver(solver), path or None)
+
+
+@dataclass
+class SuiteQuery:
+    """A query of a benchmark suite, and where it came from."""
+
+    file: str  # Path of the query, relative to the suite.
+    log: str  # Path of the log it was taken from.
+    position: int  # Position of the query in the log, from 0.
+    expected: str  # Outcome recorded by KLEE: "sat", "unsat" or "unknown".
+    elapsed: float  # Solver time recorded by KLEE, in seconds, or NaN.
+    meta: Dict[str, str] = field(default_factory=dict)  # E.g. the program.
+
+
+class BenchmarkSuite:
+    """
+    A directory of standalone .smt2 queries with a JSON manifest, replayable
+    without KLEE or the logs the queries were taken from.
+
+    Queries are kept verbatim, KLEE's comment lines included, as each is a
+    complete script that sets its logic, declares its arrays and checks sat.
+
+    Attributes:
+        root (str): The suite's directory.
+        queries (List[SuiteQuery]): The queries, in the order they were added.
+    """
+
+    MANIFEST = "manifest.json"
+    QUERY_DIR = "queries"
+
+    def __init__(self, root: str, queries: Optional[List[SuiteQuery]] = None):
+        """
+        Initialize the BenchmarkSuite. Use `create` or `load` rather than this.
+
+        Args:
+            root (str): The suite's directory.
+            queries (Optional[List[SuiteQuery]]): Queries already in the suite.
+        """
+        self.root = root
+        self.queries = queries or []
+
+    @classmethod
+    def create(cls, root: str) -> "BenchmarkSuite":
+        """
+        Create an empty suite.
+
+        Args:
+            root (str): The suite's directory, which must not hold a suite yet.
+
+        Returns:
+            BenchmarkSuite: The suite.
+        """
+        os.makedirs(os.path.join(root, cls.QUERY_DIR), exist_ok=True)
+        assert not os.path.exists(
+            os.path.join(root, cls.MANIFEST)
+        ), f"{root} already holds a suite"
+        suite = cls(root)
+        suite.save()
+        return suite
+
+    @classmethod
+    def load(cls, root: str) -> "BenchmarkSuite":
+        """
+        Load a suite.
+
+        Args:
+            root (str): The suite's directory.
+
+        Returns:
+            BenchmarkSuite: The suite.
+        """
+        with open(os.path.join(root, cls.MANIFEST), "r") as f:
+            manifest = json.load(f)
+        return cls(root, [SuiteQuery(**query) for query in manifest["queries"]])
+
+    def add(self, log: str, position: int, query: bytes, **meta: str) -> SuiteQuery:
+        """
+        Add a query to the suite, writing it out. Call `save` once done adding.
+
+        Args:
+            log (str): Path of the log the query was taken from.
+            position (int): Position of the query in the log.
+            query (bytes): The query, as split from the log by `iter_queries`.
+            **meta (str): Anything else to record about the query.
+
+        Returns:
+            SuiteQuery: The query's entry in the manifest.
+        """
+        result, elapsed = query_outcome(query)
+        entry = SuiteQuery(
+            os.path.join(self.QUERY_DIR, f"{len(self.queries):06d}.smt2"),
+            log,
+            position,
+            EXPECTED[result],
+            elapsed,
+            meta,
+        )
+        with open(os.path.join(self.root, entry.file), "wb") as f:
+            f.write(query)
+        self.queries.append(entry)
+        return entry
+
+    def save(self) -> None:
+        """Write the manifest, atomically replacing the previous one."""
+        path = os.path.join(self.root, self.MANIFEST)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"queries": [vars(q) for q in self.queries]}, f, indent=1)
+        os.replace(f"{path}.tmp", path)
+
+    def read(self, query: SuiteQuery) -> bytes:
+        """
+        Read a query of the suite.
+
+        Args:
+            query (SuiteQuery): The query's entry in the manifest.
+
+        Returns:
+            bytes: The query.
+        """
+        with open(os.path.join(self.root, query.file), "rb") as f:
+            return f.read()
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+
+def select_queries(
+    log_path: str,
+    sample: Optional[int] = None,
+    top: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> List[Tuple[int, bytes]]:
+    """
+    Choose the queries of a log to benchmark: all, a sample, or the slowest.
+
+    Args:
+        log_path (str): Path to the query log. Sampling needs it uncompressed.
+        sample (Optional[int]): Number of queries to sample uniformly.
+        top (Optional[int]): Number of queries to take with the largest solver
+            times recorded by KLEE.
+        seed (Optional[int]): Seed, for reproducible samples.
+
+    Returns:
+        List[Tuple[int, bytes]]: The position of each query chosen and the
+        query, in log order.
+    """
+    assert sample is None or top is None, "Choose a sample or the slowest, not both"
+
+    if sample is not None:
+        from queryindex import QueryIndex
+
+        with QueryIndex.open(log_path) as index:
+            positions = index.sample(min(sample, len(index)), seed)
+            return list(zip(positions, index.fetch(positions)))
+
+    with open_log(log_path) as log:
+        queries = enumerate(iter_queries(log))
+        if top is None:
+            return list(queries)
+
+        def recorded(item: Tuple[int, bytes]) -> float:
+            elapsed = query_outcome(item[1])[1]
+            return -math.inf if math.isnan(elapsed) else elapsed
+
+        return sorted(heapq.nlargest(top, queries, key=recorded))
+
+
+def build_suite(
+    root: str,
+    log_path: str,
+    sample: Optional[int] = None,
+    top: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> BenchmarkSuite:
+    """
+    Create a suite from the queries of a log, see `select_queries`.
+
+    Args:
+        root (str): The suite's directory.
+        log_path (str): Path to the query log.
+        sample (Optional[int]): Number of queries to sample uniformly.
+        top (Optional[int]): Number of slowest queries to take.
+        seed (Optional[int]): Seed, for reproducible samples.
+
+    Returns:
+        BenchmarkSuite: The suite.
+    """
+    suite = BenchmarkSuite.create(root)
+    for position, query in select_queries(log_path, sample, top, seed):
+        suite.add(log_path, position, query)
+    suite.save()
+    return suite
+
+
+@dataclass
+class Replay:
+    """The outcome of one solver on one query."""
+
+    query: SuiteQuery
+    solver: str  # Name of the SolverBinary.
+    result: str  # "sat", "unsat", "unknown", "timeout" or "error".
+    seconds: float  # Wall time, including starting the solver.
+
+    @property
+    def mismatch(self) -> bool:
+        """Whether the solver contradicts the outcome KLEE recorded."""
+        known = ("sat", "unsat")
+        return (
+            self.result in known
+            and self.query.expected in known
+            and (self.result != self.query.expected)
+        )
+
+
+def solve(binary: SolverBinary, query: bytes, timeout: float) -> Tuple[str, float]:
+    """
+    Solve one query in a fresh solver process.
+
+    Args:
+        binary (SolverBinary): The solver.
+        query (bytes): The query, a complete SMT-LIB 2 script.
+        timeout (float): Seconds after which the solver is killed.
+
+    Returns:
+        Tuple[str, float]: The result, see Replay, and the wall time in seconds.
+    """
+    start = time.perf_counter()
+    try:
+        process = subprocess.run(
+            binary.command,
+            input=query,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return "timeout", time.perf_counter() - start
+    except OSError:
+        return "error", time.perf_counter() - start
+    seconds = time.perf_counter() - start
+
+    words = process.stdout.decode(errors="replace").split()
+    result = words[0] if words else ""
+    return (result if result in ("sat", "unsat", "unknown") else "error"), seconds
+
+
+def replay(
+    suite: BenchmarkSuite,
+    binaries: Sequence[SolverBinary],
+    workers: Optional[int] = None,
+    timeout: float = 60.0,
+) -> Iterator[Replay]:
+    """
+    Solve every query of a suite with every binary, in parallel.
+
+    Each query is solved in its own solver process, at most `workers` at a time,
+    so that a crash or timeout only loses that query. Keep `workers` at or below
+    the number of physical cores, or solvers will slow each other down.
+
+    Args:
+        suite (BenchmarkSuite): The queries.
+        binaries (Sequence[SolverBinary]): The solvers.
+        workers (Optional[int]): Number of solvers run at once, by default one
+            per CPU.
+        timeout (float): Seconds after which a solver is killed.
+
+    Yields:
+        Replay: The outcome of each binary on each query, in suite order.
+    """
+
+    def run(query: SuiteQuery, binary: SolverBinary) -> Replay:
+        return Replay(query, binary.name, *solve(binary, suite.read(query), timeout))
+
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        futures = [
+            pool.submit(run, query, binary)
+            for query in suite.queries
+            for binary in binaries
+        ]
+        for future in futures:
+            yield future.result()
+
+
+@dataclass
+class SolverReport:
+    """How one solver fared on a suite."""
+
+    name: str
+    times: List[float] = field(default_factory=list)  # Of queries answered.
+    results: Dict[str, int] = field(default_factory=dict)  # By result.
+    mismatches: int = 0  # Answers contradicting KLEE's.
+
+    def add(self, replay: Replay) -> None:
+        """
+        Account for one query.
+
+        Args:
+            replay (Replay): The solver's outcome on the query.
+        """
+        self.results[replay.result] = self.results.get(replay.result, 0) + 1
+        if replay.result in ("sat", "unsat", "unknown"):
+            self.times.append(replay.seconds)
+        self.mismatches += replay.mismatch
+
+    def describe(self) -> str:
+        """
+        Summarise the report in one line.
+
+        Returns:
+            str: A human-readable summary.
+        """
+        results = ", ".join(f"{r} {count}" for r, count in sorted(self.results.items()))
+        median = statistics.median(self.times) if self.times else 0.0
+        return (
+            f"{self.name}: {results}; {sum(self.times):.2f}s solving"
+            f" (median {median:.4f}s), {self.mismatches} mismatches"
+        )
+
+
+def benchmark(
+    suite: BenchmarkSuite,
+    binaries: Sequence[SolverBinary],
+    workers: Optional[int] = None,
+    timeout: float = 60.0,
+    csv_path: Optional[str] = None,
+) -> List[SolverReport]:
+    """
+    Replay a suite against several solvers, e.g. two versions of one solver.
+
+    Args:
+        suite (BenchmarkSuite): The queries.
+        binaries (Sequence[SolverBinary]): The solvers.
+        workers (Optional[int]): Number of solvers run at once.
+        timeout (float): Seconds after which a solver is killed.
+        csv_path (Optional[str]): Where to write the outcome of every query, with
+            columns RESULT_COLUMNS, if anywhere.
+
+    Returns:
+        List[SolverReport]: A report per binary, in the order given.
+    """
+    printer = None
+    if csv_path is not None:
+        printer = ResultCSVPrinter(RESULT_COLUMNS, csv_path, False, False)
+
+    reports = {binary.name: SolverReport(binary.name) for binary in binaries}
+    for outcome in replay(suite, binaries, workers, timeout):
+        reports[outcome.solver].add(outcome)
+        if printer is not None:
+            printer.write_row(
+                [
+                    outcome.query.file,
+                    outcome.solver,
+                    outcome.result,
+                    outcome.query.expected,
+                    f"{outcome.seconds:.6f}",
+                ]
+            )
+    return list(reports.values())
+
+
+if __name__ == "__main__":
+    import sys
+
+    usage = (
+        "Usage: python solverbench.py build <query_log> <suite_dir> [sample|top <k>]\n"
+        "       python solverbench.py run <suite_dir> <solver[:binary]> ..."
+    )
+    if len(sys.argv) in (4, 6) and sys.argv[1] == "build":
+        choice = {sys.argv[4]: int(sys.argv[5])} if len(sys.argv) == 6 else {}
+        assert set(choice) <= {"sample", "top"}, usage
+        suite = build_suite(sys.argv[3], sys.argv[2], **choice)
+        print(f"Built a suite of {len(suite)} queries")
+    elif len(sys.argv) >= 4 and sys.argv[1] == "run":
+        suite = BenchmarkSuite.load(sys.argv[2])
+        binaries = [SolverBinary.parse(spec) for spec in sys.argv[3:]]
+        csv_path = os.path.join(suite.root, "results.csv")
+        for report in benchmark(suite, binaries, csv_path=csv_path):
+            print(report.describe())
+    else:
+        print(usage)
+        sys.exit(1)
@@ -2,7 +2,11 @@
 
 import csv
 import os
-from typing import List, Dict
+import threading
+from typing import TYPE_CHECKING, Any, List, Dict, Sequence
+
+if TYPE_CHECKING:
+    from kresult import KResult, KResultField
 
 # Environment variables for paths
 KLEE_BIN_PATH = os.getenv("KLEE_BIN_ABS_PATH")
@@ -70,6 +74,7 @@ class ProgressLogger:
             progress_file (str): The name of the file to log progress to.
         """
         self.progress_file = progress_file
+        self._lock = threading.Lock()  # Runs may log from concurrent workers.
         with open(self.progress_file, "w") as f:
             f.write("")
 
@@ -80,7 +85,7 @@ class ProgressLogger:
         Args:
             progress (str): The progress message to log.
         """
-        with open(self.progress_file, "a") as f:
+        with self._lock, open(self.progress_file, "a") as f:
             f.write(f"{progress}\n\n\n")
 
     def log_and_print(self, progress: str) -> None:
@@ -115,6 +120,23 @@ class ProgressLogger:
             dest.write(src.read())
 
 
+def budget_columns(
+    field: "KResultField", budgets: Sequence[Any], unit: str
+) -> List[str]:
+    """
+    Name one CSV column per budget, for results derived from a single run.
+
+    Args:
+        field (KResultField): The field reported in the columns.
+        budgets (Sequence[Any]): The budgets, e.g. [300, 600, 1800].
+        unit (str): Unit of the budgets, e.g. "s" or " instrs".
+
+    Returns:
+        List[str]: Column names, e.g. ["ICov(%) @ 300s", "ICov(%) @ 600s"].
+    """
+    return [f"{field.value} @ {budget}{unit}" for budget in budgets]
+
+
 class ResultCSVPrinter:
     """A class for writing and reading experiment results in CSV format."""
 
@@ -164,6 +186,20 @@ class ResultCSVPrinter:
         with open(self.csv_file, "a") as f:
             f.write(",".join(map(str, row)) + "\n")
 
+    def write_results(
+        self, leading: List[Any], results: List["KResult"], field: "KResultField"
+    ) -> None:
+        """
+        Write a row with one column per result, e.g. one per budget of a run.
+
+        Args:
+            leading (List[Any]): Values of the leading columns, e.g. the program.
+            results (List[KResult]): Results whose `field` fills the remaining
+                columns, as from `KResultSeries.at_times`.
+            field (KResultField): The field to report from each result.
+        """
+        self.write_row(leading + [result.get(field) for result in results])
+
     def read(self) -> str:
         """
         Read the contents of the CSV file.